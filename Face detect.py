@@ -1,12 +1,16 @@
 import cv2
-import os
+import sys
 import numpy as np
-from PIL import Image
 import tkinter as tk
+import face_cache
+import face_detection
+from face_tracker import FaceTracker
+from recognition_loop import RecognitionLoop, PreviewSink, StdoutSink
+from access_log import AccessLogWriter
 
-# Initialize face recognizer and Haar Cascade
+# Initialize face recognizer and face detector
 recognizer = cv2.face.LBPHFaceRecognizer_create()
-face_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + "haarcascade_frontalface_default.xml")
+face_detector = face_detection.FaceDetector(scale_factor=1.1, min_neighbors=5, min_size=(100, 100), roi_refresh=5)
 
 # Automatically crop and resize face from frame
 def crop_and_resize_face(gray, x, y, w, h, size=(200, 200)):
@@ -15,25 +19,12 @@ def crop_and_resize_face(gray, x, y, w, h, size=(200, 200)):
 
 # Train model from dataset folder
 def train_model(data_dir='dataset'):
-    faces = []
-    labels = []
+    data = face_cache.load_cached_dataset(data_dir)
     label_dict = {}
-    current_label = 0
-
-    for file in os.listdir(data_dir):
-        if file.endswith(".jpg"):
-            path = os.path.join(data_dir, file)
-            img = Image.open(path).convert('L')
-            img_np = np.array(img, 'uint8')
-            name = "_".join(file.split("_")[:-1])
-            if name not in label_dict:
-                label_dict[name] = current_label
-                current_label += 1
-            faces.append(cv2.resize(img_np, (200, 200)))
-            labels.append(label_dict[name])
-
-    if faces:
-        recognizer.train(faces, np.array(labels))
+    labels = [label_dict.setdefault(name, len(label_dict)) for name in data.names]
+
+    if labels:
+        recognizer.train(list(data.faces), np.array(labels, dtype=np.int32))
         return label_dict
     return {}
 
@@ -65,6 +56,7 @@ def show_denied_screen():
 def recognize_faces(label_dict):
     reverse_labels = {v: k for k, v in label_dict.items()}
     cap = cv2.VideoCapture(0)
+    tracker = FaceTracker()
     recognized = False
 
     while True:
@@ -73,11 +65,14 @@ def recognize_faces(label_dict):
             break
 
         gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-        faces = face_cascade.detectMultiScale(gray, scaleFactor=1.1, minNeighbors=5, minSize=(100, 100))
+        faces = face_detector.detect(gray)
 
-        for (x, y, w, h) in faces:
-            face = crop_and_resize_face(gray, x, y, w, h)
-            id_, confidence = recognizer.predict(face)
+        for track in tracker.update(faces):
+            (x, y, w, h) = track.box
+            if tracker.due(track):
+                face = crop_and_resize_face(gray, x, y, w, h)
+                tracker.record(track, *recognizer.predict(face))
+            id_, confidence = track.label, track.confidence
 
             if id_ in reverse_labels and confidence < 45:  # STRONG match
                 name = reverse_labels[id_]
@@ -105,10 +100,26 @@ def recognize_faces(label_dict):
     if not recognized:
         show_denied_screen()
 
+# Continuous mode: keep the camera open and print one access event per
+# person (at most every `cooldown` seconds) instead of stopping on the
+# first match and blocking on a welcome window.
+def recognize_continuous(label_dict, cooldown=10.0):
+    reverse_labels = {v: k for k, v in label_dict.items()}
+    writer = AccessLogWriter()
+    loop = RecognitionLoop(0, recognizer, reverse_labels, face_detector,
+                           [StdoutSink(), PreviewSink("Smart Face Recognition Access"), writer],
+                           threshold=45, cooldown=cooldown)
+    try:
+        loop.run()
+    finally:
+        writer.stop()
+
 # --- MAIN ---
 if __name__ == "__main__":
     labels = train_model('dataset')
-    if labels:
+    if labels and "--continuous" in sys.argv:
+        recognize_continuous(labels)
+    elif labels:
         recognize_faces(labels)
     else:
         print("❌ No training data found. Add images to the dataset folder.")
@@ -2,10 +2,16 @@ import tkinter as tk
 from tkinter import messagebox
 import cv2
 import os
+import time
 import numpy as np
+import face_model
+from frame_source import FrameSource
+from face_detection import FaceDetector
+from recognition_loop import RecognitionLoop, PreviewSink
+from prototypes import DuplicateFilter
 
 # ✅ Load Face Recognition Model
-face_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + "haarcascade_frontalface_default.xml")
+face_detector = FaceDetector(scale_factor=1.3, min_neighbors=5)
 recognizer = cv2.face.LBPHFaceRecognizer_create()
 
 if os.path.exists("trained_model.yml"):
@@ -35,22 +41,27 @@ def open_dataset_management():
     progress_label.pack(pady=5)
 
     # ✅ Function to capture face images
+    # Stops after 5 images, on "q" in the preview or after 30 seconds.
     def capture_image():
         cap = cv2.VideoCapture(0)
+        duplicates = DuplicateFilter()
         count = 0
+        deadline = time.monotonic() + 30.0
         os.makedirs("dataset", exist_ok=True)
 
-        while count < 5:
+        while count < 5 and time.monotonic() < deadline:
             ret, frame = cap.read()
             if not ret:
                 messagebox.showerror("Error", "Failed to capture image!")
                 break
 
             gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-            faces = face_cascade.detectMultiScale(gray, 1.3, 5)
+            faces = face_detector.detect(gray)
 
             for (x, y, w, h) in faces:
                 face_img = gray[y:y+h, x:x+w]
+                if not duplicates.accept(face_img):
+                    continue
                 cv2.imwrite(f"dataset/{id_entry.get()}_{count}.jpg", face_img)
                 count += 1
                 progress_label.config(text=f"Captured {count}/5 images")
@@ -58,11 +69,15 @@ def open_dataset_management():
                     break
 
             cv2.imshow("Capturing Faces", frame)
-            cv2.waitKey(100)
+            if cv2.waitKey(100) & 0xFF == ord("q"):
+                break
 
         cap.release()
         cv2.destroyAllWindows()
-        messagebox.showinfo("Success", "Face images captured successfully!")
+        if count >= 5:
+            messagebox.showinfo("Success", "Face images captured successfully!")
+        else:
+            messagebox.showwarning("Capture", f"Captured {count}/5 images.")
 
     # ✅ Function to save user data (placeholder)
     def save_to_database():
@@ -81,41 +96,19 @@ def open_dataset_management():
 
 # ✅ Function for Face Login
 def face_login():
-    cap = cv2.VideoCapture(0)
-
-    if not cap.isOpened():
+    login_detector = FaceDetector(scale_factor=1.2, min_neighbors=5, roi_refresh=5)
+    loop = RecognitionLoop(FrameSource(0), recognizer, face_model.label_names("trained_model.yml"), login_detector,
+                           [PreviewSink("Face Login")], stop_on_grant=True)
+    try:
+        event = loop.run()
+    except RuntimeError:
         messagebox.showerror("Error", "Could not open webcam.")
         return
 
-    while True:
-        ret, frame = cap.read()
-        if not ret:
-            break
-
-        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-        faces = face_cascade.detectMultiScale(gray, scaleFactor=1.2, minNeighbors=5)
-
-        for (x, y, w, h) in faces:
-            face_roi = gray[y:y + h, x:x + w]
-            label, confidence = recognizer.predict(face_roi)
-
-            if confidence < 60:
-                cap.release()
-                cv2.destroyAllWindows()
-                messagebox.showinfo("Success", "Face recognized! Login successful.")
-                open_dataset_management()
-                return
-            else:
-                cv2.rectangle(frame, (x, y), (x + w, y + h), (0, 0, 255), 2)
-                cv2.putText(frame, "Unknown", (x, y - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 0, 255), 2)
-
-        cv2.imshow("Face Login", frame)
-
-        if cv2.waitKey(1) & 0xFF == ord('q'):
-            break
-
-    cap.release()
-    cv2.destroyAllWindows()
+    if event:
+        messagebox.showinfo("Success", "Face recognized! Login successful.")
+        open_dataset_management()
+        return
     messagebox.showerror("Error", "Face not recognized!")
 
 # ✅ Main Window
@@ -1,52 +1,21 @@
 import tkinter as tk
 from tkinter import messagebox, ttk
 import sqlite3
+import database
 import os
 import cv2
-import bcrypt
-from PIL import Image, ImageTk
+import auth
+import app_shell
+import animation
+from face_detection import FaceDetector
+from video_widget import VideoView, CameraFeed
 
 # --- DATABASE SETUP ---
-conn = sqlite3.connect("users.db")
-cursor = conn.cursor()
-cursor.execute("""
-CREATE TABLE IF NOT EXISTS Users (
-    id INTEGER PRIMARY KEY AUTOINCREMENT,
-    name TEXT NOT NULL,
-    username TEXT NOT NULL UNIQUE,
-    password TEXT NOT NULL,
-    role TEXT NOT NULL DEFAULT 'admin'
-)
-""")
-cursor.execute("""
-CREATE TABLE IF NOT EXISTS UserDetails (
-    id INTEGER PRIMARY KEY AUTOINCREMENT,
-    reg_no TEXT NOT NULL,
-    full_name TEXT NOT NULL,
-    year TEXT NOT NULL
-)
-""")
-conn.commit()
-
-current_user = {"username": None, "role": None}
-
-
-# --- UTILS ---
-def hash_password(password):
-    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt())
-
-
-def verify_password(plain_password, hashed_password):
-    return bcrypt.checkpw(plain_password.encode('utf-8'), hashed_password)
+database.create_tables()
 
 
 # --- USER DETAILS FORM ---
-def user_details_form():
-    form = tk.Tk()
-    form.title("Insert User Details")
-    form.geometry("400x350")
-    form.config(bg="skyblue")
-
+def build_user_details_form(app, form):
     tk.Label(form, text="Insert User Details", font=("Times new roman", 14, "bold"), bg="skyblue").pack(pady=10)
 
     tk.Label(form, text="Reg No:", bg="skyblue").pack()
@@ -71,58 +40,77 @@ def user_details_form():
             return
 
         try:
-            cursor.execute("INSERT INTO UserDetails (reg_no, full_name, year) VALUES (?, ?, ?)", (reg, name, year))
-            conn.commit()
+            database.add_student(reg, name, year)
             messagebox.showinfo("Saved", "User details inserted successfully")
-            form.destroy()
+            app.show("main")
         except Exception as e:
             messagebox.showerror("Database Error", f"Failed to save user details: {e}")
 
+    def clear():
+        for entry in (reg_entry, name_entry, year_entry):
+            entry.delete(0, tk.END)
+    form.on_show = clear
+
     ttk.Button(form, text="Save", command=save_details).pack(pady=20)
-    form.mainloop()
 
 
 # --- FACE RECOGNITION ---
-def launch_face_recognition(username):
-    cap = cv2.VideoCapture(0)
-    face_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + "haarcascade_frontalface_default.xml")
-    while True:
-        ret, frame = cap.read()
-        if not ret:
-            break
+# Live camera view inside the app window. The camera and the detector run
+# on a CameraFeed thread for as long as the page is shown.
+def build_recognition_page(app, page):
+    view = VideoView(page)
+    view.pack(padx=10, pady=10)
+    face_detector = FaceDetector(scale_factor=1.1, min_neighbors=4, roi_refresh=5)
+    feed = [None]
+
+    def process(frame):
         gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-        faces = face_cascade.detectMultiScale(gray, 1.1, 4)
-        for (x, y, w, h) in faces:
-            cv2.rectangle(frame, (x, y), (x + w, y + h), (0, 255, 0), 2)
-            cv2.putText(frame, f"{username}", (x, y - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 255, 0), 2)
-        cv2.imshow("Face Recognition - Press 'q' to Exit", frame)
-        if cv2.waitKey(1) & 0xFF == ord('q'):
-            break
-    cap.release()
-    cv2.destroyAllWindows()
-    user_details_form()
+        return [(x, y, w, h, auth.session.username, True) for (x, y, w, h) in face_detector.detect(gray)]
+
+    def start():
+        face_detector.reset()
+
+        def finish(opened):
+            if feed[0] is not current:
+                return
+            feed[0] = None
+            if not opened:
+                messagebox.showerror("Error", "Could not open the camera")
+            app.show("details")
+
+        current = CameraFeed(view, process, 0, finish)
+        feed[0] = current.start()
+
+    def stop():
+        if feed[0]:
+            feed[0].stop()
+            feed[0] = None
+        view.stop()
+
+    page.on_show = start
+    page.on_hide = stop
+    ttk.Button(page, text="Done", style="Hover.TButton", command=lambda: app.show("details")).pack(pady=10)
 
 
 # --- LOGOUT ---
-def logout(window):
-    global current_user
-    current_user = {"username": None, "role": None}
-    window.destroy()
-    show_login_page()
+def logout(app):
+    auth.session.end()
+    app.show("login")
 
 
-# --- LOGIN PAGE ---
-def show_login_page():
-    login_window = tk.Tk()
-    login_window.title("Admin Login")
-    login_window.geometry("900x500")
+# Admin actions check the session token instead of asking for the password
+# again; once it has expired the admin is sent back to the login page.
+def with_session(app, action):
+    if auth.session.valid("admin"):
+        action()
+    else:
+        messagebox.showwarning("Session expired", "Please log in again")
+        logout(app)
 
-    style = ttk.Style(login_window)
-    style.theme_use("clam")
-    style.configure("Hover.TButton", background="green", foreground="white", font=("Times new roman", 12))
-    style.map("Hover.TButton", background=[("active", "#228B22")])
 
-    container = tk.Frame(login_window)
+# --- LOGIN PAGE ---
+def build_login_page(app, page):
+    container = tk.Frame(page)
     container.pack(fill=tk.BOTH, expand=True)
 
     left_frame = tk.Frame(container, width=450, height=500)
@@ -135,49 +123,21 @@ def show_login_page():
     container.grid_columnconfigure(1, weight=1)
     container.grid_rowconfigure(0, weight=1)
 
-    try:
-        bg_img = Image.open("FACE.png")
-    except:
-        bg_img = Image.new("RGB", (800, 800), "black")
-
-    bg_img = bg_img.resize((800, 800), Image.Resampling.LANCZOS)
-    bg_photo = ImageTk.PhotoImage(bg_img)
-    bg_label = tk.Label(left_frame, image=bg_photo)
-    bg_label.image = bg_photo
+    bg_label = tk.Label(left_frame, image=app.assets.image("FACE.png", (800, 800), fallback="black"))
     bg_label.place(x=0, y=0, relwidth=1, relheight=1)
 
     # --- Moving Label Animation ---
     text_label = tk.Label(left_frame, text="GROUP 13 SMART FACE RECOGNITION PROJECT", fg="white", bg="black",
                           font=("Arial", 14, "bold"))
-    text_label.place(x=45, y=440)
-
-    dx, dy = 2, 2
-    max_x, max_y = 350, 450
-    min_x, min_y = 0, 0
-
-    def animate_text():
-        nonlocal dx, dy
-        x = text_label.winfo_x()
-        y = text_label.winfo_y()
-        if x + dx > max_x or x + dx < min_x:
-            dx = -dx
-        if y + dy > max_y or y + dy < min_y:
-            dy = -dy
-        text_label.place(x=x + dx, y=y + dy)
-        left_frame.after(30, animate_text)
 
-    animate_text()
+    # 2 px every 30 ms, driven by the shared animation scheduler: it stops
+    # while the login page is hidden or the window is unfocused.
+    animation.bounce(text_label, 45, 440, max_x=350, max_y=450, speed=(66, 66))
 
     # --- RIGHT FRAME CONTENT ---
-    try:
-        logo_img = Image.open("FACE 1.png")
-        logo_img = logo_img.resize((100, 100), Image.Resampling.LANCZOS)
-        logo_photo = ImageTk.PhotoImage(logo_img)
-        logo_label = tk.Label(right_frame, image=logo_photo, bg="skyblue")
-        logo_label.image = logo_photo
-        logo_label.pack(pady=(30, 10))
-    except Exception as e:
-        print("Error loading logo:", e)
+    logo_photo = app.assets.image("FACE 1.png", (100, 100))
+    if logo_photo:
+        tk.Label(right_frame, image=logo_photo, bg="skyblue").pack(pady=(30, 10))
 
     tk.Label(right_frame, text="Hi, welcome back", font=("Arial", 18, "bold"),
              bg="skyblue", fg="green").pack(pady=(0, 5))
@@ -188,12 +148,9 @@ def show_login_page():
     form_frame.pack(pady=30)
 
     tk.Label(form_frame, text="Username", bg="skyblue", font=("Times new roman", 10)).grid(row=0, column=0, sticky='w')
-    cursor.execute("SELECT username FROM Users WHERE role='admin'")
-    usernames = [row[0] for row in cursor.fetchall()]
     username_var = tk.StringVar()
-    username_dropdown = ttk.Combobox(form_frame, textvariable=username_var, values=usernames, state="readonly", width=28)
+    username_dropdown = ttk.Combobox(form_frame, textvariable=username_var, state="readonly", width=28)
     username_dropdown.grid(row=1, column=0, pady=5)
-    username_dropdown.set("Select username")
 
     tk.Label(form_frame, text="Password", bg="skyblue", font=("Times new roman", 10)).grid(row=2, column=0, sticky='w')
     pw_frame = tk.Frame(form_frame)
@@ -208,58 +165,69 @@ def show_login_page():
     remember_var = tk.IntVar()
     tk.Checkbutton(form_frame, text="Remember me", variable=remember_var, bg="skyblue").grid(row=4, column=0, sticky='w', pady=10)
 
+    # The page is built once; each visit reloads the admin list (a signup may
+    # have added one) and clears the password.
+    def reset():
+        username_dropdown.config(values=database.admin_usernames())
+        username_dropdown.set("Select username")
+        password_entry.delete(0, tk.END)
+        login_button.config(state=tk.NORMAL)
+    page.on_show = reset
+
+    # bcrypt runs on the auth workers; the button stays disabled until
+    # finish_login() gets the answer back on the Tk thread.
     def login():
         username = username_var.get().strip()
         password = password_entry.get().strip()
-        cursor.execute("SELECT * FROM Users WHERE username=?", (username,))
-        user = cursor.fetchone()
-        if user and verify_password(password, user[3]):
+        if auth.call(page, auth.authenticate, username, password, done=finish_login, failed=login_failed):
+            login_button.config(state=tk.DISABLED)
+        else:
+            messagebox.showwarning("Busy", "Still checking a login, please try again")
+
+    def login_failed(error):
+        login_button.config(state=tk.NORMAL)
+        messagebox.showerror("Error", f"Login failed: {error}")
+
+    def finish_login(user):
+        login_button.config(state=tk.NORMAL)
+        if user:
             if user[4] != "admin":
                 messagebox.showerror("Access Denied", "Only admins can log in to this system.")
                 return
-            global current_user
-            current_user["username"] = user[2]
-            current_user["role"] = user[4]
-            login_window.destroy()
-            open_main_app(user)
+            auth.session.start(user)
+            app.show("main")
         else:
             messagebox.showerror("Error", "Invalid credentials")
 
-    def open_main_app(user):
-        main_app = tk.Tk()
-        main_app.title(f"Admin Panel - {user[1]}")
-        main_app.geometry("400x300")
-        tk.Label(main_app, text=f"Welcome {user[1]}", font=("Times new roman", 14)).pack(pady=20)
-        ttk.Button(main_app, text="Start Face Recognition", style="Hover.TButton",
-                   command=lambda: [main_app.destroy(), launch_face_recognition(user[2])]).pack(pady=10)
-        ttk.Button(main_app, text="Logout", style="Hover.TButton",
-                   command=lambda: logout(main_app)).pack(pady=10)
-        main_app.mainloop()
-
-    ttk.Button(right_frame, text="Login", style="Hover.TButton", command=login).pack(pady=10)
+    login_button = ttk.Button(right_frame, text="Login", style="Hover.TButton", command=login)
+    login_button.pack(pady=10)
 
     tk.Label(right_frame, text="Don't have an account?", bg="skyblue", font=("Times new roman", 9)).pack()
     tk.Button(right_frame, text="Sign up here", bg="skyblue", fg="blue", bd=0,
               font=("Times new roman", 9, "underline"),
-              command=lambda: [login_window.destroy(), show_signup_page()]).pack()
+              command=lambda: app.show("signup")).pack()
 
     tk.Label(right_frame, text="© 2025 - Group 13 Project", font=("Times new roman", 9), bg="skyblue").pack(side=tk.BOTTOM, pady=15)
 
-    login_window.mainloop()
 
+# --- ADMIN PANEL ---
+def build_main_app(app, main_app):
+    welcome = tk.Label(main_app, font=("Times new roman", 14))
+    welcome.pack(pady=20)
 
-# --- SIGNUP PAGE ---
-def show_signup_page():
-    signup_window = tk.Tk()
-    signup_window.title("Sign Up")
-    signup_window.geometry("400x460")
-    signup_window.config(bg="skyblue")
+    ttk.Button(main_app, text="Start Face Recognition", style="Hover.TButton",
+               command=lambda: with_session(app, lambda: app.show("recognition"))).pack(pady=10)
+    ttk.Button(main_app, text="Logout", style="Hover.TButton",
+               command=lambda: logout(app)).pack(pady=10)
+
+    def greet():
+        app.root.title(f"Admin Panel - {auth.session.name}")
+        welcome.config(text=f"Welcome {auth.session.name}")
+    main_app.on_show = greet
 
-    style = ttk.Style(signup_window)
-    style.theme_use("clam")
-    style.configure("Hover.TButton", background="#228B22", foreground="white", font=("Arial", 11))
-    style.map("Hover.TButton", background=[("active", "#006400")])
 
+# --- SIGNUP PAGE ---
+def build_signup_page(app, signup_window):
     tk.Label(signup_window, text="Create Admin Account", font=("Arial", 16, "bold"), bg="skyblue", fg="green").pack(pady=15)
 
     tk.Label(signup_window, text="Name", bg="skyblue").pack()
@@ -291,6 +259,12 @@ def show_signup_page():
     def toggle_password(entry_widget):
         entry_widget.config(show="" if entry_widget.cget("show") == "*" else "*")
 
+    def clear():
+        for entry in (name_entry, username_entry, staffno_entry, password_entry, confirm_pw_entry):
+            entry.delete(0, tk.END)
+        signup_button.config(state=tk.NORMAL)
+    signup_window.on_show = clear
+
     def signup():
         name = name_entry.get().strip()
         username = username_entry.get().strip()
@@ -306,27 +280,44 @@ def show_signup_page():
             messagebox.showerror("Error", "Passwords do not match")
             return
 
-        hashed_pw = hash_password(password)
+        if auth.call(signup_window, auth.register, name, username, password,
+                     done=finish_signup, failed=signup_failed):
+            signup_button.config(state=tk.DISABLED)
+        else:
+            messagebox.showwarning("Busy", "Still creating an account, please try again")
 
-        try:
-            cursor.execute("INSERT INTO Users (name, username, password) VALUES (?, ?, ?)",
-                           (name, username, hashed_pw))
-            conn.commit()
-            messagebox.showinfo("Success", "Account created successfully")
-            signup_window.destroy()
-            show_login_page()
-        except sqlite3.IntegrityError:
+    def finish_signup(user_id):
+        messagebox.showinfo("Success", "Account created successfully")
+        app.show("login")
+
+    def signup_failed(error):
+        signup_button.config(state=tk.NORMAL)
+        if isinstance(error, sqlite3.IntegrityError):
             messagebox.showerror("Error", "Username already exists")
+        else:
+            messagebox.showerror("Error", f"Could not create account: {error}")
 
-    ttk.Button(signup_window, text="Sign Up", style="Hover.TButton", command=signup).pack(pady=20)
+    signup_button = ttk.Button(signup_window, text="Sign Up", style="Hover.TButton", command=signup)
+    signup_button.pack(pady=20)
 
     tk.Label(signup_window, text="Already have an account?", bg="skyblue", font=("Times new roman", 9)).pack()
     tk.Button(signup_window, text="Login here", bg="skyblue", fg="blue", bd=0,
               font=("Times new roman", 9, "underline"),
-              cursor="hand2", command=lambda: [signup_window.destroy(), show_login_page()]).pack()
-
-    signup_window.mainloop()
+              cursor="hand2", command=lambda: app.show("login")).pack()
 
 
 # --- START APP ---
-show_login_page()
+# One root for every page; each page is built on its first visit and kept.
+app = app_shell.App("Admin Login")
+style = ttk.Style(app.root)
+style.theme_use("clam")
+style.configure("Hover.TButton", background="green", foreground="white", font=("Times new roman", 12))
+style.map("Hover.TButton", background=[("active", "#228B22")])
+app.assets.preload([("FACE.png", (800, 800), "black"), ("FACE 1.png", (100, 100))])
+
+app.add("login", build_login_page, "Admin Login", "900x500")
+app.add("signup", build_signup_page, "Sign Up", "400x460", bg="skyblue")
+app.add("main", build_main_app, "Admin Panel", "400x300")
+app.add("recognition", build_recognition_page, "Face Recognition", "680x560")
+app.add("details", build_user_details_form, "Insert User Details", "400x350", bg="skyblue")
+app.run("login")
@@ -0,0 +1,167 @@
+import os
+import sys
+import time
+import queue
+import sqlite3
+import tempfile
+import threading
+import database
+
+INSERT = ("INSERT INTO access_events (timestamp, kind, name, label, confidence, source, track_id, frame_id) "
+          "VALUES (?, ?, ?, ?, ?, ?, ?, ?)")
+
+
+# -------------------------
+# Batched Access Log Writer
+# -------------------------
+# Recognition threads only put events on a queue. One writer thread owns a
+# dedicated connection (database.PRAGMAS: WAL, synchronous=NORMAL) and
+# inserts whatever has piled up with a single executemany + commit, at the
+# latest every `flush_ms` milliseconds or as soon as `batch_size` events
+# are waiting. The INSERT is
+# one constant string, so sqlite3's statement cache prepares it once.
+# event() makes the writer usable as a RecognitionLoop sink; it has no
+# close(), so one shared writer outlives the loops it is attached to.
+class AccessLogWriter:
+    def __init__(self, db_path=None, source="camera0", batch_size=100, flush_ms=250, maxsize=10000):
+        self.db_path = db_path or database.DB_PATH
+        self.source = str(source)
+        self.batch_size = batch_size
+        self.flush_interval = flush_ms / 1000.0
+        self.queue = queue.Queue(maxsize=maxsize)
+        self.dropped = 0
+        self.written = 0
+        self.batches = 0
+        self._ready = threading.Event()
+        self._error = None
+        self.thread = threading.Thread(target=self._run, name="access-log", daemon=True)
+        self.thread.start()
+        self._ready.wait()
+        if self._error:
+            raise self._error
+
+    def log(self, timestamp, kind, name=None, label=None, confidence=None, track_id=None, frame_id=None,
+            source=None):
+        row = (timestamp, kind, name, label, confidence, source or self.source, track_id, frame_id)
+        try:
+            self.queue.put_nowait(row)
+        except queue.Full:
+            self.dropped += 1
+
+    def event(self, event):
+        self.log(event.timestamp, event.kind, event.name, event.label, event.confidence,
+                 event.track_id, event.frame_id)
+
+    def _connect(self):
+        conn = database.open_connection(self.db_path)
+        database.migrate(conn)
+        return conn
+
+    def _run(self):
+        try:
+            conn = self._connect()
+        except sqlite3.Error as e:
+            self._error = e
+            self._ready.set()
+            return
+        self._ready.set()
+
+        rows, waiters, done = [], [], False
+        deadline = None
+        try:
+            while not done:
+                timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+                try:
+                    item = self.queue.get(timeout=timeout)
+                    if item is None:
+                        done = True
+                    elif isinstance(item, threading.Event):
+                        waiters.append(item)
+                    else:
+                        rows.append(item)
+                        if deadline is None:
+                            deadline = time.monotonic() + self.flush_interval
+                except queue.Empty:
+                    pass
+
+                if rows and (done or waiters or len(rows) >= self.batch_size or time.monotonic() >= deadline):
+                    try:
+                        with conn:
+                            conn.executemany(INSERT, rows)
+                        self.written += len(rows)
+                        self.batches += 1
+                    except sqlite3.Error as e:
+                        print(f"[access-log] dropped {len(rows)} events: {e}")
+                        self.dropped += len(rows)
+                    rows, deadline = [], None
+                for waiter in waiters:
+                    waiter.set()
+                waiters = []
+        finally:
+            conn.close()
+
+    # Blocks until every event logged before this call is committed.
+    def flush(self, timeout=5.0):
+        waiter = threading.Event()
+        self.queue.put(waiter)
+        return waiter.wait(timeout)
+
+    def stop(self, timeout=5.0):
+        if self.thread.is_alive():
+            self.queue.put(None)
+            self.thread.join(timeout)
+
+
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def get_writer():
+    global _writer
+    with _writer_lock:
+        if _writer is None:
+            _writer = AccessLogWriter()
+        return _writer
+
+
+def recent_events(limit=50):
+    with database.connection() as conn:
+        return conn.execute("SELECT timestamp, kind, name, confidence, source FROM access_events "
+                            "ORDER BY timestamp DESC LIMIT ?", (limit,)).fetchall()
+
+
+# -------------------------
+# Benchmark: per-event commit vs batched writer
+# -------------------------
+def benchmark(n=5000):
+    tmp = tempfile.mkdtemp()
+
+    path = os.path.join(tmp, "per_event.db")
+    conn = database.open_connection(path)
+    database.migrate(conn)
+    conn.close()
+    start = time.perf_counter()
+    for i in range(n):
+        conn = sqlite3.connect(path)
+        conn.execute(INSERT, (time.time(), "granted", "BRIAN_RUKENYA", 0, 30.0, "camera0", i, i))
+        conn.commit()
+        conn.close()
+    per_event = time.perf_counter() - start
+
+    writer = AccessLogWriter(os.path.join(tmp, "batched.db"))
+    start = time.perf_counter()
+    for i in range(n):
+        writer.log(time.time(), "granted", "BRIAN_RUKENYA", 0, 30.0, i, i)
+    enqueue = time.perf_counter() - start
+    writer.flush()
+    batched = time.perf_counter() - start
+    writer.stop()
+
+    print(f"{n} events")
+    print(f"connect/commit per event  {n / per_event:>10.0f} events/s")
+    print(f"batched writer            {n / batched:>10.0f} events/s  ({writer.batches} commits, "
+          f"{enqueue / n * 1e6:.1f} us per log() call)")
+
+
+if __name__ == "__main__":
+    benchmark(*(int(a) for a in sys.argv[1:2]))
@@ -0,0 +1,128 @@
+import time
+
+
+# -------------------------
+# Animation Scheduler
+# -------------------------
+# One after() timer per Tk root drives every animation on it. An animation
+# is step(dt) for a widget, called with the seconds since the last frame;
+# returning False ends it. The timer only runs while some animated widget
+# is viewable (its screen is shown and the window is not minimised) and,
+# with pause_unfocused, while the app has keyboard focus. Otherwise it is
+# cancelled outright, so an idle or background window gets no wakeups at
+# all; Map/Unmap/FocusIn/FocusOut events start it again. An animation is
+# dropped when its widget is destroyed.
+class Scheduler:
+    def __init__(self, root, fps=30, pause_unfocused=True):
+        self.root = root
+        self.interval = max(1, int(1000 / fps))
+        self.pause_unfocused = pause_unfocused
+        self.animations = {}
+        self.ticks = 0
+        self._next_id = 0
+        self._job = None
+        self._pending = None
+        self._last = 0.0
+        for sequence in ("<Map>", "<Unmap>", "<FocusIn>", "<FocusOut>"):
+            root.bind_all(sequence, self._changed, add="+")
+        root.bind("<Destroy>", self._on_destroy, add="+")
+
+    def add(self, widget, step):
+        self._next_id += 1
+        key = self._next_id
+        self.animations[key] = (widget, step)
+        widget.bind("<Destroy>", lambda e: self.remove(key) if e.widget is widget else None, add="+")
+        self._changed()
+        return key
+
+    def remove(self, key):
+        self.animations.pop(key, None)
+        if not self.animations:
+            self._cancel()
+
+    @property
+    def running(self):
+        return self._job is not None
+
+    def _active(self):
+        if self.pause_unfocused and not self.root.tk.call("focus"):
+            return []
+        active = []
+        for key, (widget, step) in list(self.animations.items()):
+            if not widget.winfo_exists():
+                self.animations.pop(key, None)
+            elif widget.winfo_viewable():
+                active.append((key, step))
+        return active
+
+    # Visibility and focus are re-checked once the event burst is over.
+    def _changed(self, event=None):
+        if self._pending is None and self.animations:
+            self._pending = self.root.after_idle(self._refresh)
+
+    def _refresh(self):
+        self._pending = None
+        if self._active():
+            if self._job is None:
+                self._last = time.monotonic()
+                self._job = self.root.after(self.interval, self._tick)
+        else:
+            self._cancel()
+
+    def _tick(self):
+        self._job = None
+        now = time.monotonic()
+        dt, self._last = now - self._last, now
+        active = self._active()
+        for key, step in active:
+            if step(dt) is False:
+                self.animations.pop(key, None)
+        self.ticks += 1
+        if active and self.animations:
+            self._job = self.root.after(self.interval, self._tick)
+
+    def _cancel(self):
+        if self._job is not None:
+            self.root.after_cancel(self._job)
+            self._job = None
+
+    def _on_destroy(self, event):
+        if event.widget is self.root:
+            self._cancel()
+            if self._pending is not None:
+                self.root.after_cancel(self._pending)
+                self._pending = None
+            self.animations.clear()
+
+
+def get_scheduler(widget):
+    root = widget._root()
+    if not hasattr(root, "animation_scheduler"):
+        root.animation_scheduler = Scheduler(root)
+    return root.animation_scheduler
+
+
+def animate(widget, step):
+    return get_scheduler(widget).add(widget, step)
+
+
+# -------------------------
+# Animations
+# -------------------------
+# Moves a place()d widget from (x, y) at `speed` pixels a second per axis,
+# bouncing off the box (min_x, min_y)-(max_x, max_y). The position is kept
+# here, so no winfo_x/winfo_y round trips to Tk on each frame.
+def bounce(widget, x, y, max_x, max_y, min_x=0, min_y=0, speed=(66, 66)):
+    state = {"x": float(x), "y": float(y), "dx": float(speed[0]), "dy": float(speed[1])}
+    widget.place(x=x, y=y)
+
+    def step(dt):
+        for axis, delta, low, high in (("x", "dx", min_x, max_x), ("y", "dy", min_y, max_y)):
+            position = state[axis] + state[delta] * dt
+            if position > high or position < low:
+                state[delta] = -state[delta]
+                position = min(high, max(low, position))
+            state[axis] = position
+        widget.place(x=int(state["x"]), y=int(state["y"]))
+
+    return animate(widget, step)
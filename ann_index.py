@@ -0,0 +1,213 @@
+import os
+import sys
+import json
+import time
+import shutil
+import numpy as np
+from embedding_recognizer import EmbeddingRecognizer, top_k
+
+
+# -------------------------
+# IVF Index
+# -------------------------
+# Inverted-file index over L2-normalised descriptors: spherical k-means
+# splits the gallery into `nlist` cells and a query only scores the rows of
+# its `nprobe` closest cells. Rows are stored sorted by cell, so each cell is
+# one contiguous slice of vectors.npy and the saved index can be opened with
+# mmap_mode="r". Inserts go to a small pending block (scanned exactly) and
+# deletes are tombstones until the next compact()/save().
+def kmeans(vectors, nlist, iters=10, seed=0):
+    rng = np.random.default_rng(seed)
+    centroids = vectors[rng.choice(len(vectors), nlist, replace=False)].copy()
+    for _ in range(iters):
+        assign = np.argmax(vectors @ centroids.T, axis=1)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assign, vectors)
+        norms = np.linalg.norm(sums, axis=1, keepdims=True)
+        empty = norms[:, 0] == 0
+        sums[empty] = centroids[empty]
+        norms[empty] = 1.0
+        centroids = sums / norms
+    return np.ascontiguousarray(centroids, dtype=np.float32)
+
+
+class IVFIndex:
+    def __init__(self, centroids, vectors, ids, offsets, nprobe=8):
+        self.centroids = centroids
+        self.vectors = vectors
+        self.ids = ids
+        self.offsets = offsets
+        self.nprobe = nprobe
+        self.dim = centroids.shape[1]
+        self.pending_vectors = np.empty((0, self.dim), dtype=np.float32)
+        self.pending_ids = np.empty(0, dtype=np.int32)
+        self.deleted = set()
+
+    @classmethod
+    def build(cls, vectors, ids, nlist=None, nprobe=8, iters=10):
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        ids = np.asarray(ids, dtype=np.int32)
+        nlist = min(len(vectors), nlist or max(1, int(np.sqrt(len(vectors)))))
+        centroids = kmeans(vectors, nlist, iters)
+        return cls.from_centroids(centroids, vectors, ids, nprobe)
+
+    @classmethod
+    def from_centroids(cls, centroids, vectors, ids, nprobe=8):
+        assign = np.argmax(vectors @ centroids.T, axis=1) if len(vectors) else np.empty(0, dtype=np.int64)
+        order = np.argsort(assign, kind="stable")
+        offsets = np.searchsorted(assign[order], np.arange(len(centroids) + 1)).astype(np.int64)
+        return cls(centroids, np.ascontiguousarray(vectors[order]), ids[order], offsets, nprobe)
+
+    def __len__(self):
+        alive = len(self.ids) + len(self.pending_ids)
+        if self.deleted:
+            alive -= int(np.isin(self.ids, list(self.deleted)).sum())
+            alive -= int(np.isin(self.pending_ids, list(self.deleted)).sum())
+        return alive
+
+    def add(self, vectors, ids):
+        ids = np.asarray(ids, dtype=np.int32).ravel()
+        if self.deleted & set(ids.tolist()):
+            self.compact()
+        self.pending_vectors = np.vstack([self.pending_vectors, np.asarray(vectors, dtype=np.float32)])
+        self.pending_ids = np.concatenate([self.pending_ids, ids])
+
+    def remove(self, id_):
+        self.deleted.add(int(id_))
+
+    def compact(self):
+        vectors = np.vstack([self.vectors, self.pending_vectors])
+        ids = np.concatenate([self.ids, self.pending_ids])
+        if self.deleted:
+            keep = ~np.isin(ids, list(self.deleted))
+            vectors, ids = vectors[keep], ids[keep]
+        fresh = IVFIndex.from_centroids(self.centroids, vectors, ids, self.nprobe)
+        self.vectors, self.ids, self.offsets = fresh.vectors, fresh.ids, fresh.offsets
+        self.pending_vectors = np.empty((0, self.dim), dtype=np.float32)
+        self.pending_ids = np.empty(0, dtype=np.int32)
+        self.deleted = set()
+
+    # Returns (ids, similarities), both (len(queries), k), best match first.
+    # Queries that find fewer than k live rows are padded with id -1.
+    def search(self, queries, k=1):
+        queries = np.asarray(queries, dtype=np.float32)
+        nprobe = min(self.nprobe, len(self.centroids))
+        probes = np.argpartition(-(queries @ self.centroids.T), nprobe - 1, axis=1)[:, :nprobe]
+        out_ids = np.full((len(queries), k), -1, dtype=np.int32)
+        out_scores = np.full((len(queries), k), -np.inf, dtype=np.float32)
+        deleted = list(self.deleted)
+
+        for qi, query in enumerate(queries):
+            rows = np.concatenate([np.arange(self.offsets[c], self.offsets[c + 1]) for c in probes[qi]])
+            cand_ids = np.concatenate([self.ids[rows], self.pending_ids])
+            scores = np.concatenate([self.vectors[rows] @ query, self.pending_vectors @ query])
+            if deleted:
+                scores[np.isin(cand_ids, deleted)] = -np.inf
+            if not len(scores):
+                continue
+            ids, best = top_k(scores[None, :], cand_ids, k)
+            n = best.shape[1]
+            out_ids[qi, :n] = np.where(np.isfinite(best[0]), ids[0], -1)
+            out_scores[qi, :n] = best[0]
+        return out_ids, out_scores
+
+    def save(self, path):
+        self.compact()
+        tmp = path + ".tmp"
+        shutil.rmtree(tmp, ignore_errors=True)
+        os.makedirs(tmp)
+        np.save(os.path.join(tmp, "centroids.npy"), self.centroids)
+        np.save(os.path.join(tmp, "vectors.npy"), self.vectors)
+        np.save(os.path.join(tmp, "ids.npy"), self.ids)
+        np.save(os.path.join(tmp, "offsets.npy"), self.offsets)
+        with open(os.path.join(tmp, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump({"nprobe": self.nprobe, "dim": self.dim, "nlist": len(self.centroids)}, f)
+        old = path + ".old"
+        if os.path.exists(path):
+            shutil.rmtree(old, ignore_errors=True)
+            os.replace(path, old)
+        os.replace(tmp, path)
+        shutil.rmtree(old, ignore_errors=True)
+
+    @classmethod
+    def load(cls, path, mmap=True):
+        mode = "r" if mmap else None
+        with open(os.path.join(path, "meta.json"), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        return cls(np.load(os.path.join(path, "centroids.npy")),
+                   np.load(os.path.join(path, "vectors.npy"), mmap_mode=mode),
+                   np.load(os.path.join(path, "ids.npy"), mmap_mode=mode),
+                   np.load(os.path.join(path, "offsets.npy")),
+                   meta["nprobe"])
+
+
+# -------------------------
+# Indexed Recognizer
+# -------------------------
+# EmbeddingRecognizer whose gallery lives in an IVFIndex instead of one
+# flat matrix. Same train/update/remove/predict/save/read interface; the
+# model path is a directory of .npy files.
+class IndexedRecognizer(EmbeddingRecognizer):
+    def __init__(self, embedder=None, confidence_scale=250.0, nprobe=8):
+        super().__init__(embedder, confidence_scale)
+        self.nprobe = nprobe
+        self.index = None
+
+    def train(self, faces, labels):
+        self.index = IVFIndex.build(self.embed(faces), labels, nprobe=self.nprobe)
+
+    def update(self, faces, labels):
+        if self.index is None:
+            return self.train(faces, labels)
+        self.index.add(self.embed(faces), labels)
+
+    def remove(self, label):
+        if self.index is not None:
+            self.index.remove(label)
+
+    def __len__(self):
+        return len(self.index) if self.index is not None else 0
+
+    def search(self, faces, k=1):
+        return self.index.search(self.embed(faces), k)
+
+    def save(self, path):
+        self.index.save(path)
+
+    def read(self, path):
+        self.index = IVFIndex.load(path)
+
+
+# -------------------------
+# Benchmark: IVF vs exact
+# -------------------------
+def benchmark(n=50000, dim=128, people=2500, queries=500, noise=1.0, nprobe_values=(1, 4, 8, 16), seed=0):
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((people, dim)).astype(np.float32)
+    ids = rng.integers(0, people, n).astype(np.int32)
+    gallery = centers[ids] + noise * rng.standard_normal((n, dim)).astype(np.float32)
+    gallery /= np.linalg.norm(gallery, axis=1, keepdims=True)
+    q_ids = rng.integers(0, people, queries)
+    q = centers[q_ids] + noise * rng.standard_normal((queries, dim)).astype(np.float32)
+    q /= np.linalg.norm(q, axis=1, keepdims=True)
+
+    start = time.perf_counter()
+    exact_ids, _ = top_k(q @ gallery.T, ids, 1)
+    exact_ms = (time.perf_counter() - start) / queries * 1000
+    print(f"gallery {n} x {dim}, {queries} queries")
+    print(f"exact     {exact_ms:.3f} ms/query")
+
+    start = time.perf_counter()
+    index = IVFIndex.build(gallery, ids)
+    print(f"build     {time.perf_counter() - start:.2f} s, nlist {len(index.centroids)}")
+    for nprobe in nprobe_values:
+        index.nprobe = nprobe
+        start = time.perf_counter()
+        found, _ = index.search(q, 1)
+        ms = (time.perf_counter() - start) / queries * 1000
+        recall = float(np.mean(found[:, 0] == exact_ids[:, 0]))
+        print(f"nprobe {nprobe:<3}{ms:.3f} ms/query  recall@1 {recall:.3f}")
+
+
+if __name__ == "__main__":
+    benchmark(*(int(a) for a in sys.argv[1:3]))
@@ -0,0 +1,97 @@
+import tkinter as tk
+from PIL import Image, ImageTk
+
+
+# -------------------------
+# Image Assets
+# -------------------------
+# Every image is opened, resized to the size it is shown at and turned into
+# a PhotoImage once per (path, size), then kept for the life of the root, so
+# showing a screen again decodes and resizes nothing. A file that cannot be
+# read becomes a plain `fallback` coloured image, or None without one.
+class AssetCache:
+    def __init__(self, master):
+        self.master = master
+        self.images = {}
+
+    def image(self, path, size, fallback=None):
+        key = (path, tuple(size))
+        if key in self.images:
+            return self.images[key]
+        try:
+            with Image.open(path) as img:
+                img = img.convert("RGBA" if "A" in img.getbands() or img.mode == "P" else "RGB")
+                img = img.resize(tuple(size), Image.Resampling.LANCZOS)
+        except OSError as e:
+            print(f"[assets] {path}: {e}")
+            if fallback is None:
+                self.images[key] = None
+                return None
+            img = Image.new("RGB", tuple(size), fallback)
+        photo = ImageTk.PhotoImage(img, master=self.master)
+        self.images[key] = photo
+        return photo
+
+    def preload(self, specs):
+        for spec in specs:
+            self.image(*spec)
+
+
+# -------------------------
+# Application Shell
+# -------------------------
+# One Tk root and one mainloop for the whole app. A screen is registered
+# with add(name, build) and built the first time it is shown: build(app,
+# frame) fills a Frame owned by the shell. After that show() only swaps
+# which frame is packed, so switching screens creates no widgets and leaks
+# no windows. A builder can set frame.on_show(**kwargs) to refresh the
+# cached screen (clear a form, reload a list) and frame.on_hide() to stop
+# work that only makes sense while it is visible.
+class App:
+    def __init__(self, title="Smart Face Recognition", geometry=None):
+        self.root = tk.Tk()
+        self.title = title
+        self.root.title(title)
+        if geometry:
+            self.root.geometry(geometry)
+        self.assets = AssetCache(self.root)
+        self.screens = {}
+        self.frames = {}
+        self.current = None
+
+    def add(self, name, build, title=None, geometry=None, bg=None):
+        self.screens[name] = (build, title, geometry, bg)
+
+    def frame(self, name):
+        frame = self.frames.get(name)
+        if frame is None:
+            build, _, _, bg = self.screens[name]
+            frame = tk.Frame(self.root, bg=bg)
+            build(self, frame)
+            self.frames[name] = frame
+        return frame
+
+    def show(self, name, **kwargs):
+        frame = self.frame(name)
+        _, title, geometry, _ = self.screens[name]
+        previous = self.frames.get(self.current)
+        if previous is not None and previous is not frame:
+            if hasattr(previous, "on_hide"):
+                previous.on_hide()
+            previous.pack_forget()
+        self.current = name
+        self.root.title(title or self.title)
+        if geometry:
+            self.root.geometry(geometry)
+        frame.pack(fill=tk.BOTH, expand=True)
+        if hasattr(frame, "on_show"):
+            frame.on_show(**kwargs)
+        return frame
+
+    def run(self, name=None, **kwargs):
+        if name:
+            self.show(name, **kwargs)
+        self.root.mainloop()
+
+    def quit(self):
+        self.root.destroy()
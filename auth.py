@@ -0,0 +1,324 @@
+import os
+import sys
+import hmac
+import time
+import base64
+import hashlib
+import platform
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import bcrypt
+import database
+
+# Work factor for new hashes; pick it with `python auth.py [target_ms]` on
+# the machine the app runs on. Existing hashes keep the cost they were
+# made with, bcrypt stores it in the hash.
+BCRYPT_ROUNDS = int(os.environ.get("SMARTFACE_BCRYPT_ROUNDS", "12"))
+MAX_WORKERS = 2
+MAX_PENDING = 4
+SESSION_TTL = int(os.environ.get("SMARTFACE_SESSION_TTL", "900"))
+# Tokens only have to survive this process, so a random key is enough
+# unless several processes must accept each other's tokens.
+SECRET = os.environ.get("SMARTFACE_SECRET", "").encode("utf-8") or os.urandom(32)
+# The client bucket is per terminal: every login typed at this machine
+# shares it, so it is a terminal-wide ceiling on guessing across usernames
+# and is sized for everyone queueing at a kiosk, not for one person. Set
+# SMARTFACE_CLIENT to tell apart terminals that share a host name.
+CLIENT_ID = os.environ.get("SMARTFACE_CLIENT", platform.node() or "local")
+
+# Attempts as (burst, seconds per extra attempt). Sign-ups have their own
+# bucket so creating accounts does not use up the terminal's logins.
+USERNAME_LIMIT = (5, 30.0)
+CLIENT_LIMIT = (30, 2.0)
+REGISTER_LIMIT = (5, 60.0)
+
+
+# -------------------------
+# Password Hashing
+# -------------------------
+def hash_password(password, rounds=None):
+    return bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt(rounds or BCRYPT_ROUNDS))
+
+
+def verify_password(password, hashed):
+    if isinstance(hashed, str):
+        hashed = hashed.encode("utf-8")
+    return bcrypt.checkpw(password.encode("utf-8"), hashed)
+
+
+# -------------------------
+# Rate Limiting
+# -------------------------
+class RateLimited(Exception):
+    def __init__(self, retry_after):
+        self.retry_after = retry_after
+        super().__init__(f"Too many attempts, try again in {max(1, int(retry_after + 0.999))} s")
+
+
+# Holds up to `capacity` tokens and gains one every `per` seconds. take()
+# spends one, or returns how many seconds until one is available.
+class TokenBucket:
+    def __init__(self, capacity, per):
+        self.capacity = capacity
+        self.per = per
+        self.tokens = float(capacity)
+        self.last = time.monotonic()
+
+    def take(self, now=None):
+        now = time.monotonic() if now is None else now
+        self.tokens = min(self.capacity, self.tokens + (now - self.last) / self.per)
+        self.last = now
+        if self.tokens >= 1.0:
+            self.tokens -= 1.0
+            return 0.0
+        return (1.0 - self.tokens) * self.per
+
+
+# One bucket per key (a username or a client id). Only the `max_keys` most
+# recently used keys are kept; an evicted key simply starts full again.
+class RateLimiter:
+    def __init__(self, capacity, per, max_keys=10000):
+        self.capacity = capacity
+        self.per = per
+        self.max_keys = max_keys
+        self.buckets = OrderedDict()
+        self.lock = threading.Lock()
+
+    def check(self, key):
+        with self.lock:
+            bucket = self.buckets.pop(key, None) or TokenBucket(self.capacity, self.per)
+            self.buckets[key] = bucket
+            if len(self.buckets) > self.max_keys:
+                self.buckets.popitem(last=False)
+            wait = bucket.take()
+        if wait:
+            raise RateLimited(wait)
+
+
+username_limiter = RateLimiter(*USERNAME_LIMIT)
+client_limiter = RateLimiter(*CLIENT_LIMIT)
+register_limiter = RateLimiter(*REGISTER_LIMIT)
+
+
+_dummy_hash = None
+
+
+# Returns the account row (id, name, username, password, role) or None.
+# Both limiters are checked before anything touches bcrypt and raise
+# RateLimited when spent. An unknown username is still checked against a
+# throwaway hash so it takes as long as a wrong password.
+def authenticate(username, password, client=CLIENT_ID):
+    global _dummy_hash
+    client_limiter.check(client)
+    username_limiter.check(username.lower())
+    account = database.get_account(username)
+    if account is None:
+        if _dummy_hash is None:
+            _dummy_hash = hash_password("smartface")
+        verify_password(password, _dummy_hash)
+        return None
+    return account if verify_password(password, account[3]) else None
+
+
+# Raises sqlite3.IntegrityError when the username is taken.
+def register(name, username, password, role="admin", client=CLIENT_ID):
+    register_limiter.check(client)
+    return database.create_user(name, username, hash_password(password), role)
+
+
+# -------------------------
+# Sessions
+# -------------------------
+# A token is "<payload>.<signature>", both urlsafe base64, where the payload
+# is "username|role|expiry|nonce" and the signature its HMAC-SHA256 under
+# SECRET. Checking one is a hash of a few dozen bytes, not a database
+# query plus bcrypt.
+def _b64(data):
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode("ascii")
+
+
+def _unb64(text):
+    return base64.urlsafe_b64decode(text + "=" * (-len(text) % 4))
+
+
+def issue_token(username, role, ttl=SESSION_TTL):
+    payload = f"{username}|{role}|{int(time.time() + ttl)}|{os.urandom(8).hex()}".encode("utf-8")
+    signature = hmac.new(SECRET, payload, hashlib.sha256).digest()
+    return f"{_b64(payload)}.{_b64(signature)}"
+
+
+# Returns (username, role, expiry) or None for a forged, garbled or
+# expired token.
+def verify_token(token):
+    try:
+        payload, signature = (_unb64(part) for part in token.split("."))
+        if not hmac.compare_digest(signature, hmac.new(SECRET, payload, hashlib.sha256).digest()):
+            return None
+        username, role, expiry, _ = payload.decode("utf-8").rsplit("|", 3)
+    except (ValueError, AttributeError):
+        return None
+    if time.time() >= int(expiry):
+        return None
+    return username, role, int(expiry)
+
+
+# The logged-in admin. start() is called once bcrypt has accepted the
+# password; after that the pages only ask valid(), which checks the token,
+# until it expires or end() is called on logout.
+class Session:
+    def __init__(self, ttl=SESSION_TTL):
+        self.ttl = ttl
+        self.token = None
+        self.account = None
+
+    def start(self, account):
+        self.account = account
+        self.token = issue_token(account[2], account[4], self.ttl)
+        return self.token
+
+    def end(self):
+        self.token = None
+        self.account = None
+
+    def valid(self, role=None):
+        claims = verify_token(self.token) if self.token else None
+        if claims is None:
+            return False
+        return role is None or claims[1] == role
+
+    @property
+    def username(self):
+        return self.account[2] if self.account else None
+
+    @property
+    def name(self):
+        return self.account[1] if self.account else None
+
+    @property
+    def role(self):
+        return self.account[4] if self.account else None
+
+
+session = Session()
+
+
+# -------------------------
+# Auth Service
+# -------------------------
+# bcrypt takes hundreds of milliseconds at a production cost, so the pages
+# never call it on the Tk thread. call() runs fn(*args) on a small worker
+# pool (bcrypt releases the GIL while hashing) and the Tk thread polls the
+# future with widget.after(); done(result) or failed(error) then run on the
+# Tk thread. At most `max_pending` jobs are queued or running at once;
+# beyond that call() returns False instead of piling up more work. Results
+# for a widget that has been destroyed in the meantime are dropped.
+class AuthService:
+    def __init__(self, workers=MAX_WORKERS, max_pending=MAX_PENDING, poll_ms=20):
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="auth")
+        self.slots = threading.BoundedSemaphore(max_pending)
+        self.poll_ms = poll_ms
+
+    def call(self, widget, fn, *args, done=None, failed=None):
+        if not self.slots.acquire(blocking=False):
+            return False
+        future = self.executor.submit(fn, *args)
+        future.add_done_callback(lambda f: self.slots.release())
+
+        def poll():
+            try:
+                if not widget.winfo_exists():
+                    return
+            except Exception:
+                return
+            if not future.done():
+                widget.after(self.poll_ms, poll)
+                return
+            error = future.exception()
+            if error is None:
+                if done:
+                    done(future.result())
+            elif failed:
+                failed(error)
+            else:
+                print(f"[auth] {error}")
+
+        widget.after(self.poll_ms, poll)
+        return True
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False)
+
+
+_service = None
+_service_lock = threading.Lock()
+
+
+def get_service():
+    global _service
+    with _service_lock:
+        if _service is None:
+            _service = AuthService()
+        return _service
+
+
+def call(widget, fn, *args, done=None, failed=None):
+    return get_service().call(widget, fn, *args, done=done, failed=failed)
+
+
+# -------------------------
+# Benchmark: choose the cost factor
+# -------------------------
+# Times one hash per cost on this machine and recommends the highest cost
+# that stays under `target_ms`. Then shows how long a UI thread that ticks
+# every 10 ms is stalled by a login hashed inline vs through the service.
+def benchmark(target_ms=250, max_rounds=16):
+    chosen = 4
+    print(f"target {target_ms} ms per hash")
+    for rounds in range(4, max_rounds + 1):
+        start = time.perf_counter()
+        hashed = hash_password("correct horse battery staple", rounds)
+        verify_password("correct horse battery staple", hashed)
+        elapsed = (time.perf_counter() - start) * 1000 / 2
+        print(f"cost {rounds:2d}  {elapsed:8.1f} ms")
+        if elapsed > target_ms:
+            break
+        chosen = rounds
+    print(f"recommended: SMARTFACE_BCRYPT_ROUNDS={chosen}")
+
+    hashed = hash_password("secret", chosen)
+
+    def worst_gap(start_job, job_done):
+        gaps, last = [], time.perf_counter()
+        start_job()
+        while not job_done():
+            time.sleep(0.01)
+            now = time.perf_counter()
+            gaps.append(now - last)
+            last = now
+        return max(gaps or [time.perf_counter() - last]) * 1000
+
+    state = {}
+    inline = worst_gap(lambda: state.update(ok=verify_password("secret", hashed)), lambda: "ok" in state)
+    service = AuthService()
+    future = []
+    offloaded = worst_gap(lambda: future.append(service.executor.submit(verify_password, "secret", hashed)),
+                          lambda: future[0].done())
+    service.shutdown()
+    print(f"UI thread stall per login  inline {inline:8.1f} ms   auth service {offloaded:6.1f} ms")
+
+    # A guessing loop against one account: only the bucket's burst reaches bcrypt.
+    limiter = RateLimiter(*USERNAME_LIMIT)
+    hashed_runs, start = 0, time.perf_counter()
+    for attempt in range(100):
+        try:
+            limiter.check("admin")
+        except RateLimited:
+            continue
+        verify_password(f"guess{attempt}", hashed)
+        hashed_runs += 1
+    print(f"100 guesses at one username  {hashed_runs} reached bcrypt, {time.perf_counter() - start:.2f} s of CPU")
+
+
+if __name__ == "__main__":
+    benchmark(*(int(a) for a in sys.argv[1:2]))
@@ -0,0 +1,282 @@
+import os
+import sys
+import csv
+import json
+import time
+import argparse
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+import cv2
+import face_model
+import face_detection
+from recognition_service import CONFIDENCE_THRESHOLD
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp")
+VIDEO_EXTENSIONS = (".mp4", ".avi", ".mov", ".mkv", ".webm")
+FIELDS = ["source", "frame", "time_ms", "x", "y", "w", "h", "label", "name", "confidence"]
+
+
+# -------------------------
+# Job List
+# -------------------------
+# Inputs are image files, video files or folders of either. Images are
+# grouped into batches of `batch` files and videos are cut into segments of
+# `segment` frames, so one long video still spreads over every worker. Each
+# job carries the checkpoint keys it completes.
+def collect_inputs(paths):
+    images, videos = [], []
+    for path in paths:
+        files = [path]
+        if os.path.isdir(path):
+            files = []
+            for root, dirs, names in os.walk(path):
+                dirs.sort()
+                files.extend(os.path.join(root, name) for name in sorted(names))
+        for file in files:
+            ext = os.path.splitext(file)[1].lower()
+            if ext in IMAGE_EXTENSIONS:
+                images.append(file)
+            elif ext in VIDEO_EXTENSIONS:
+                videos.append(file)
+    return images, videos
+
+
+def make_jobs(images, videos, batch=32, segment=500, every=1):
+    jobs = []
+    for start in range(0, len(images), batch):
+        chunk = images[start:start + batch]
+        jobs.append(("images", chunk, chunk))
+    for path in videos:
+        cap = cv2.VideoCapture(path)
+        total = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        cap.release()
+        if total <= 0:
+            jobs.append(("video", (path, 0, None, every), [f"{path}#0"]))
+            continue
+        for start in range(0, total, segment):
+            jobs.append(("video", (path, start, min(total, start + segment), every), [f"{path}#{start}"]))
+    return jobs
+
+
+# -------------------------
+# Checkpoint
+# -------------------------
+# The checkpoint holds the finished job keys and the output size at that
+# point. On resume the output is cut back to that size, so rows of a job
+# that was running when the previous run died are written exactly once.
+def load_checkpoint(path):
+    if not path or not os.path.exists(path):
+        return set(), 0
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    return set(data["done"]), data["output_bytes"]
+
+
+def save_checkpoint(path, done, output_bytes):
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump({"done": sorted(done), "output_bytes": output_bytes}, f)
+        os.replace(tmp, path)
+    except BaseException:
+        os.remove(tmp)
+        raise
+
+
+# -------------------------
+# Workers
+# -------------------------
+# Detection, decoding and LBPH predict all release the GIL, so plain threads
+# run in parallel. Cascades and recognizers are not shared between threads;
+# each worker thread loads its own on first use.
+class BatchRecognizer:
+    def __init__(self, model_path=face_model.MODEL_PATH, threshold=CONFIDENCE_THRESHOLD, detect_params=None):
+        self.model_path = model_path
+        self.threshold = threshold
+        self.detect_params = detect_params or {}
+        self.names = face_model.label_names(model_path)
+        self._local = threading.local()
+
+    def _recognizer(self):
+        if not hasattr(self._local, "recognizer"):
+            self._local.recognizer = face_model.load_recognizer(self.model_path)
+        return self._local.recognizer
+
+    def _detector(self, roi_refresh=0):
+        return face_detection.FaceDetector(**dict(self.detect_params, roi_refresh=roi_refresh))
+
+    def recognize(self, detector, frame, source, frame_id, time_ms):
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) if frame.ndim == 3 else frame
+        recognizer = self._recognizer()
+        rows = []
+        for (x, y, w, h) in detector.detect(gray):
+            face = face_detection.crop_and_resize_face(gray, x, y, w, h)
+            label, conf = recognizer.predict(face)
+            name = self.names.get(label, "") if conf < self.threshold else ""
+            rows.append({"source": source, "frame": frame_id, "time_ms": time_ms, "x": x, "y": y, "w": w, "h": h,
+                         "label": int(label), "name": name, "confidence": round(float(conf), 2)})
+        return rows
+
+    # Returns (rows, frames processed) for one job.
+    def run(self, job):
+        kind, payload, _ = job
+        if kind == "images":
+            if not hasattr(self._local, "image_detector"):
+                self._local.image_detector = self._detector()
+            rows, frames = [], 0
+            for path in payload:
+                frame = cv2.imread(path)
+                if frame is None:
+                    continue
+                frames += 1
+                rows.extend(self.recognize(self._local.image_detector, frame, path, 0, 0))
+            return rows, frames
+
+        path, start, end, every = payload
+        detector = self._detector(self.detect_params.get("roi_refresh", 5))
+        cap = cv2.VideoCapture(path)
+        if start:
+            cap.set(cv2.CAP_PROP_POS_FRAMES, start)
+        rows, frames, frame_id = [], 0, start
+        try:
+            while end is None or frame_id < end:
+                if frame_id % every:
+                    if not cap.grab():
+                        break
+                    frame_id += 1
+                    continue
+                ret, frame = cap.read()
+                if not ret:
+                    break
+                time_ms = int(cap.get(cv2.CAP_PROP_POS_MSEC))
+                rows.extend(self.recognize(detector, frame, path, frame_id, time_ms))
+                frames += 1
+                frame_id += 1
+        finally:
+            cap.release()
+        return rows, frames
+
+
+# -------------------------
+# Output Writers
+# -------------------------
+class CsvWriter:
+    def __init__(self, f, write_header):
+        self.writer = csv.DictWriter(f, FIELDS)
+        if write_header:
+            self.writer.writeheader()
+
+    def write(self, rows):
+        self.writer.writerows(rows)
+
+
+class JsonlWriter:
+    def __init__(self, f, write_header):
+        self.f = f
+
+    def write(self, rows):
+        for row in rows:
+            self.f.write(json.dumps(row) + "\n")
+
+
+def run_batch(inputs, output, fmt="csv", checkpoint=None, workers=None, model_path=face_model.MODEL_PATH,
+              threshold=CONFIDENCE_THRESHOLD, detect_params=None, batch=32, segment=500, every=1,
+              report_every=5.0, checkpoint_every=2.0):
+    workers = workers or min(8, os.cpu_count() or 1)
+    cv2.setNumThreads(1)
+    images, videos = collect_inputs(inputs)
+    done, output_bytes = load_checkpoint(checkpoint)
+    jobs = [job for job in make_jobs(images, videos, batch, segment, every) if not set(job[2]) <= done]
+    print(f"{len(images)} images, {len(videos)} videos, {len(jobs)} jobs to run"
+          f"{f' ({len(done)} done before)' if done else ''}", file=sys.stderr)
+
+    engine = BatchRecognizer(model_path, threshold, detect_params)
+    mode = "r+" if done and os.path.exists(output) else "w"
+    start = last_report = last_save = time.monotonic()
+    frames = faces = 0
+    with open(output, mode, newline="", encoding="utf-8") as f:
+        f.seek(output_bytes if mode == "r+" else 0)
+        f.truncate()
+        writer = (JsonlWriter if fmt == "jsonl" else CsvWriter)(f, f.tell() == 0)
+        offset = f.tell()
+        pending = iter(jobs)
+        pool = ThreadPoolExecutor(max_workers=workers)
+        running = {}
+        try:
+            for job in pending:
+                running[pool.submit(engine.run, job)] = job
+                if len(running) >= workers * 2:
+                    break
+            while running:
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    job = running.pop(future)
+                    rows, count = future.result()
+                    writer.write(rows)
+                    offset = f.tell()
+                    done.update(job[2])
+                    frames += count
+                    faces += len(rows)
+                    next_job = next(pending, None)
+                    if next_job is not None:
+                        running[pool.submit(engine.run, next_job)] = next_job
+
+                now = time.monotonic()
+                if checkpoint and now - last_save >= checkpoint_every:
+                    last_save = now
+                    f.flush()
+                    save_checkpoint(checkpoint, done, offset)
+                if now - last_report >= report_every:
+                    last_report = now
+                    print(f"[progress] {frames} frames, {faces} faces, {frames / (now - start):.1f} frames/s",
+                          file=sys.stderr)
+        finally:
+            for future in running:
+                future.cancel()
+            pool.shutdown(wait=True)
+            if checkpoint:
+                f.flush()
+                save_checkpoint(checkpoint, done, offset)
+
+    elapsed = time.monotonic() - start
+    fps = frames / elapsed if elapsed else 0.0
+    print(f"done: {frames} frames, {faces} faces in {elapsed:.1f}s ({fps:.1f} frames/s)", file=sys.stderr)
+    return frames, faces, fps
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Recognize faces in image folders and video files.")
+    parser.add_argument("inputs", nargs="+", help="image file, video file or folder")
+    parser.add_argument("-o", "--output", required=True, help="results file (.csv or .jsonl)")
+    parser.add_argument("--format", choices=["csv", "jsonl"], default=None)
+    parser.add_argument("--checkpoint", default=None, help="resume file (default: <output>.ckpt.json)")
+    parser.add_argument("--no-checkpoint", action="store_true")
+    parser.add_argument("--model", default=face_model.MODEL_PATH)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--threshold", type=float, default=CONFIDENCE_THRESHOLD)
+    parser.add_argument("--every", type=int, default=1, help="process every Nth video frame")
+    parser.add_argument("--segment", type=int, default=500, help="video frames per job")
+    parser.add_argument("--detector", choices=["haar", "lbp", "yunet"], default=face_detection.DEFAULT_BACKEND)
+    parser.add_argument("--scale", type=float, default=1.0, help="detection downscale factor, e.g. 0.5")
+    parser.add_argument("--scale-factor", type=float, default=1.3)
+    parser.add_argument("--min-neighbors", type=int, default=5)
+    parser.add_argument("--min-size", type=int, default=0,
+                        help="smallest face side in full-resolution pixels (0: the detector's own minimum)")
+    parser.add_argument("--roi-refresh", type=int, default=5, help="full-frame scan every N video frames")
+    args = parser.parse_args(argv)
+
+    fmt = args.format or ("jsonl" if args.output.endswith(".jsonl") else "csv")
+    checkpoint = None if args.no_checkpoint else (args.checkpoint or args.output + ".ckpt.json")
+    detect_params = {"backend": args.detector, "scale": args.scale, "scale_factor": args.scale_factor,
+                     "min_neighbors": args.min_neighbors, "min_size": (args.min_size, args.min_size) if args.min_size else None,
+                     "roi_refresh": args.roi_refresh}
+    try:
+        run_batch(args.inputs, args.output, fmt, checkpoint, args.workers, args.model, args.threshold,
+                  detect_params, segment=args.segment, every=max(1, args.every))
+    except KeyboardInterrupt:
+        print("interrupted; rerun the same command to resume", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
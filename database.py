@@ -1,44 +1,463 @@
+import os
+import re
+import sys
+import time
+import queue
 import sqlite3
+import tempfile
+import threading
+from contextlib import contextmanager
 
-# Connect to the SQLite database
-def connect_db():
-    return sqlite3.connect("smartface.db")
+# One database for the whole application. The files the pages used to
+# write on their own are imported once by the "import legacy databases"
+# migration below.
+DB_PATH = os.environ.get("SMARTFACE_DB", "smartface.db")
+LEGACY_DATABASES = ["users.db", "face_recognition.db", "SmartFaceRecognition.db",
+                    "smart_face_recognition.db", "userdetails.db"]
+POOL_SIZE = 4
 
-# Create necessary tables (Users table)
-def create_tables():
-    conn = connect_db()
-    cursor = conn.cursor()
-    
-    # Create table for user details
-    cursor.execute('''
+PRAGMAS = [
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA foreign_keys=ON",
+    "PRAGMA busy_timeout=5000",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-8000",
+    "PRAGMA mmap_size=67108864",
+]
+
+
+# -------------------------
+# Schema + Migrations
+# -------------------------
+# PRAGMA user_version holds the number of migrations applied. Each
+# migration runs in its own transaction, so a failed upgrade leaves the
+# database at the previous version. Append new migrations, never edit old
+# ones.
+def _table_columns(conn, table):
+    return [row[1] for row in conn.execute(f'PRAGMA table_info("{table}")')]
+
+
+def _migrate_base_schema(conn):
+    # Old smartface.db kept students in a table called "users"
+    if "reg_no" in _table_columns(conn, "users"):
+        conn.execute("ALTER TABLE users RENAME TO legacy_students")
+    conn.execute("""
         CREATE TABLE IF NOT EXISTS users (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
             name TEXT NOT NULL,
+            username TEXT NOT NULL UNIQUE,
+            password TEXT NOT NULL,
+            role TEXT NOT NULL DEFAULT 'admin'
+        )""")
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS students (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
             reg_no TEXT NOT NULL,
-            year TEXT,
-            image_path TEXT
-        )
-    ''')
-    
-    conn.commit()
-    conn.close()
+            full_name TEXT NOT NULL,
+            year TEXT NOT NULL,
+            face_image_path TEXT
+        )""")
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS access_events (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            timestamp REAL NOT NULL,
+            kind TEXT NOT NULL,
+            name TEXT,
+            label INTEGER,
+            confidence REAL,
+            source TEXT,
+            track_id INTEGER,
+            frame_id INTEGER
+        )""")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_access_events_timestamp ON access_events (timestamp)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_access_events_name ON access_events (name, timestamp)")
+    if "reg_no" in _table_columns(conn, "legacy_students"):
+        conn.execute("INSERT INTO students (reg_no, full_name, year, face_image_path) "
+                     "SELECT reg_no, name, COALESCE(year, ''), image_path FROM legacy_students")
+        conn.execute("DROP TABLE legacy_students")
+
+
+# Column names differ per legacy file: Users/users, UserDetails.year vs
+# year_of_registration, students.name/regno. Rows already present (same
+# username, or same reg_no + full name) are skipped.
+def _legacy_rows(path):
+    legacy = sqlite3.connect(path)
+    try:
+        tables = {name.lower(): name for (name,) in
+                  legacy.execute("SELECT name FROM sqlite_master WHERE type='table'")}
+        accounts, students = [], []
+        table = tables.get("users")
+        columns = _table_columns(legacy, table) if table else []
+        if "username" in columns:
+            name = "name" if "name" in columns else "username"
+            role = "role" if "role" in columns else "'admin'"
+            accounts = legacy.execute(f"SELECT {name}, username, password, {role} FROM {table} "
+                                      f"WHERE username IS NOT NULL AND password IS NOT NULL").fetchall()
+
+        sources = []
+        if "reg_no" in columns:
+            sources.append((table, "reg_no", "name", "year", "image_path"))
+        for key in ("userdetails", "students"):
+            if key not in tables:
+                continue
+            cols = _table_columns(legacy, tables[key])
+            reg = "reg_no" if "reg_no" in cols else "regno"
+            name = "full_name" if "full_name" in cols else "name"
+            year = "year" if "year" in cols else "year_of_registration"
+            image = "face_image_path" if "face_image_path" in cols else "NULL"
+            sources.append((tables[key], reg, name, year, image))
+        for table, reg, name, year, image in sources:
+            students += legacy.execute(f"SELECT {reg}, {name}, COALESCE({year}, ''), {image} FROM {table} "
+                                       f"WHERE {reg} IS NOT NULL AND {name} IS NOT NULL").fetchall()
+        return accounts, students
+    finally:
+        legacy.close()
+
+
+def _import_legacy(conn, path):
+    accounts, students = _legacy_rows(path)
+    conn.executemany("INSERT OR IGNORE INTO users (name, username, password, role) VALUES (?, ?, ?, ?)", accounts)
+    conn.executemany("""
+        INSERT INTO students (reg_no, full_name, year, face_image_path)
+        SELECT ?1, ?2, ?3, ?4 WHERE NOT EXISTS (
+            SELECT 1 FROM students WHERE reg_no = ?1 AND full_name = ?2)""", students)
+
+
+def _migrate_import_legacy(conn):
+    main = next(row[2] for row in conn.execute("PRAGMA database_list") if row[1] == "main")
+    if not main:
+        return
+    for file in LEGACY_DATABASES:
+        path = os.path.join(os.path.dirname(main), file)
+        if os.path.exists(path) and os.path.abspath(path) != os.path.abspath(main):
+            _import_legacy(conn, path)
+
+
+# students_fts is an external-content FTS5 index over full_name and
+# reg_no: the text lives only in students, the triggers keep the index in
+# step with every insert, update and delete. SQLite builds without FTS5
+# just get the B-tree indexes; search_students() then falls back to LIKE.
+def _migrate_search_indexes(conn):
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_students_reg_no ON students (reg_no COLLATE NOCASE)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_students_year ON students (year)")
+    try:
+        conn.execute("CREATE VIRTUAL TABLE students_fts USING fts5("
+                     "full_name, reg_no, content='students', content_rowid='id')")
+    except sqlite3.OperationalError as e:
+        if "fts5" not in str(e):
+            raise
+        return
+    conn.execute("""
+        CREATE TRIGGER students_fts_insert AFTER INSERT ON students BEGIN
+            INSERT INTO students_fts (rowid, full_name, reg_no) VALUES (new.id, new.full_name, new.reg_no);
+        END""")
+    conn.execute("""
+        CREATE TRIGGER students_fts_delete AFTER DELETE ON students BEGIN
+            INSERT INTO students_fts (students_fts, rowid, full_name, reg_no)
+            VALUES ('delete', old.id, old.full_name, old.reg_no);
+        END""")
+    conn.execute("""
+        CREATE TRIGGER students_fts_update AFTER UPDATE OF full_name, reg_no ON students BEGIN
+            INSERT INTO students_fts (students_fts, rowid, full_name, reg_no)
+            VALUES ('delete', old.id, old.full_name, old.reg_no);
+            INSERT INTO students_fts (rowid, full_name, reg_no) VALUES (new.id, new.full_name, new.reg_no);
+        END""")
+    conn.execute("INSERT INTO students_fts (students_fts) VALUES ('rebuild')")
+
+
+MIGRATIONS = [_migrate_base_schema, _migrate_import_legacy, _migrate_search_indexes]
+
+
+def migrate(conn, upto=None):
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+    for number, migration in enumerate(MIGRATIONS[version:upto], version + 1):
+        try:
+            conn.execute("BEGIN")
+            migration(conn)
+            conn.execute(f"PRAGMA user_version={number}")
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+    return len(MIGRATIONS)
+
+
+# -------------------------
+# Connection Pool
+# -------------------------
+# Connections are opened once (pragmas applied, schema migrated) and handed
+# out from a queue; check_same_thread=False lets any thread use a
+# connection it has borrowed. connection() commits on success and rolls
+# back on error before putting the connection back.
+def open_connection(path=None):
+    conn = sqlite3.connect(path or DB_PATH, check_same_thread=False)
+    for pragma in PRAGMAS:
+        conn.execute(pragma)
+    return conn
+
+
+class ConnectionPool:
+    def __init__(self, path=None, size=POOL_SIZE):
+        self.path = path or DB_PATH
+        self.size = size
+        self._idle = queue.LifoQueue()
+        self._opened = 0
+        self._lock = threading.Lock()
+        conn = open_connection(self.path)
+        migrate(conn)
+        self._opened = 1
+        self._idle.put(conn)
+
+    def acquire(self, timeout=10.0):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if self._opened < self.size:
+                self._opened += 1
+                return open_connection(self.path)
+        return self._idle.get(timeout=timeout)
+
+    def release(self, conn):
+        if conn.in_transaction:
+            conn.rollback()
+        self._idle.put(conn)
+
+    @contextmanager
+    def connection(self):
+        conn = self.acquire()
+        try:
+            yield conn
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+        finally:
+            self.release(conn)
+
+    def close(self):
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+        self._opened = 0
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ConnectionPool()
+        return _pool
+
+
+def connection():
+    return get_pool().connection()
+
+
+def create_tables():
+    get_pool()
+
+
+def has_table(conn, name):
+    return conn.execute("SELECT 1 FROM sqlite_master WHERE name = ?", (name,)).fetchone() is not None
+
+
+# -------------------------
+# Admin Accounts
+# -------------------------
+# Rows are (id, name, username, password, role). create_user raises
+# sqlite3.IntegrityError when the username is taken.
+def create_user(name, username, password_hash, role="admin"):
+    with connection() as conn:
+        cur = conn.execute("INSERT INTO users (name, username, password, role) VALUES (?, ?, ?, ?)",
+                           (name, username, password_hash, role))
+        return cur.lastrowid
+
+
+def get_account(username):
+    with connection() as conn:
+        return conn.execute("SELECT id, name, username, password, role FROM users WHERE username = ?",
+                            (username,)).fetchone()
+
+
+def admin_usernames():
+    with connection() as conn:
+        return [row[0] for row in conn.execute("SELECT username FROM users WHERE role = 'admin' ORDER BY username")]
+
+
+# -------------------------
+# Students
+# -------------------------
+# Rows are (id, reg_no, full_name, year), the column order the user
+# management table shows.
+STUDENT_COLUMNS = "id, reg_no, full_name, year"
+
+
+def add_student(reg_no, full_name, year, face_image_path=None):
+    with connection() as conn:
+        cur = conn.execute("INSERT INTO students (reg_no, full_name, year, face_image_path) VALUES (?, ?, ?, ?)",
+                           (reg_no, full_name, year, face_image_path))
+        return cur.lastrowid
+
+
+# Every listing is ordered by id and takes `after_id`, the id of the last
+# row already shown, so the next page is an index seek (WHERE id > ?)
+# instead of an OFFSET that rescans every earlier row.
+def list_students(limit=-1, after_id=0):
+    with connection() as conn:
+        return conn.execute(f"SELECT {STUDENT_COLUMNS} FROM students WHERE id > ? ORDER BY id LIMIT ?",
+                            (after_id, limit)).fetchall()
+
+
+# Reg-no-shaped queries ("SIK/B/01-017") are a prefix range on
+# idx_students_reg_no; when no reg no starts that way (a hyphenated name
+# like "Mary-Jane") they are searched as names instead. Anything else goes
+# to students_fts: "kas chr" matches students with one word (in the name or
+# reg no) starting with "kas" and another starting with "chr";
+# prefix=False matches whole words only. Every path returns rows in id
+# order, so LIMIT stops the scan early and `after_id` pages through the
+# matches like list_students(). LIKE patterns escape % and _ with a
+# backslash, so they match literally.
+def fts_query(query, prefix=True):
+    tokens = re.findall(r"\w+", query)
+    return " ".join(f'"{t}"*' if prefix else f'"{t}"' for t in tokens)
+
+
+def like_escape(text):
+    return text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def search_students(query, limit=100, prefix=True, after_id=0):
+    query = query.strip()
+    match = fts_query(query, prefix)
+    if not match:
+        return list_students(limit, after_id)
+    with connection() as conn:
+        pattern = like_escape(query) + ("%" if prefix else "")
+        if ("/" in query or "-" in query) and conn.execute(
+                "SELECT 1 FROM students WHERE reg_no LIKE ? ESCAPE '\\' LIMIT 1", (pattern,)).fetchone():
+            # With LIMIT bound as a parameter the planner walks the rowid
+            # instead, so the prefix range is pinned to the index.
+            return conn.execute(f"SELECT {STUDENT_COLUMNS} FROM students INDEXED BY idx_students_reg_no "
+                                "WHERE reg_no LIKE ? ESCAPE '\\' AND id > ? ORDER BY id LIMIT ?",
+                                (pattern, after_id, limit)).fetchall()
+        if not has_table(conn, "students_fts"):
+            return conn.execute(f"SELECT {STUDENT_COLUMNS} FROM students WHERE (reg_no LIKE ? ESCAPE '\\' "
+                                "OR full_name LIKE ? ESCAPE '\\') AND id > ? ORDER BY id LIMIT ?",
+                                (pattern, pattern, after_id, limit)).fetchall()
+        return conn.execute("SELECT s.id, s.reg_no, s.full_name, s.year FROM students_fts f "
+                            "JOIN students s ON s.id = f.rowid WHERE students_fts MATCH ? "
+                            "AND f.rowid > ? ORDER BY f.rowid LIMIT ?", (match, after_id, limit)).fetchall()
+
+
+def students_by_year(year, limit=-1, after_id=0):
+    with connection() as conn:
+        return conn.execute(f"SELECT {STUDENT_COLUMNS} FROM students WHERE year = ? AND id > ? ORDER BY id LIMIT ?",
+                            (year, after_id, limit)).fetchall()
+
+
+def update_student(student_id, reg_no, full_name, year):
+    with connection() as conn:
+        conn.execute("UPDATE students SET reg_no = ?, full_name = ?, year = ? WHERE id = ?",
+                     (reg_no, full_name, year, student_id))
+
+
+def delete_student(student_id):
+    with connection() as conn:
+        conn.execute("DELETE FROM students WHERE id = ?", (student_id,))
+
+
+# Students whose face-data label (full name, spaces as underscores) is
+# `label`; face_model keys images and model entries by that label.
+def count_students_with_label(label):
+    with connection() as conn:
+        return conn.execute("SELECT COUNT(*) FROM students WHERE REPLACE(TRIM(full_name), ' ', '_') = ?",
+                            (label,)).fetchone()[0]
+
+
+def get_student_by_name(full_name):
+    with connection() as conn:
+        return conn.execute(f"SELECT {STUDENT_COLUMNS} FROM students WHERE full_name = ?",
+                            (full_name,)).fetchone()
+
 
 # Optional: Insert new user (helper function)
 def insert_user(name, reg_no, year, image_path):
-    conn = connect_db()
-    cursor = conn.cursor()
-    cursor.execute('''
-        INSERT INTO users (name, reg_no, year, image_path)
-        VALUES (?, ?, ?, ?)
-    ''', (name, reg_no, year, image_path))
-    conn.commit()
-    conn.close()
+    return add_student(reg_no, name, year, image_path)
+
 
 # Optional: Fetch user by name (for checking registered faces)
 def get_user_by_name(name):
-    conn = connect_db()
-    cursor = conn.cursor()
-    cursor.execute('SELECT * FROM users WHERE name = ?', (name,))
-    result = cursor.fetchone()
+    with connection() as conn:
+        return conn.execute("SELECT id, full_name, reg_no, year, face_image_path FROM students WHERE full_name = ?",
+                            (name,)).fetchone()
+
+
+# -------------------------
+# Benchmark: search with and without indexes
+# -------------------------
+# Fills a scratch database with `n` students, then times the old
+# LIKE '%q%' scan and year filter before the search migration, and the
+# indexed year filter and search_students() itself after it, and a deep
+# page of the student list fetched with OFFSET against the keyset seek.
+def benchmark(n=100000, repeat=200):
+    global _pool
+    path = os.path.join(tempfile.mkdtemp(), "bench.db")
+    conn = open_connection(path)
+    migrate(conn, upto=2)
+    first = ["JOHN", "MARY", "BRIAN", "CHRISTABEL", "KENNEDY", "JULIET", "TOM", "ANN", "PETER", "GRACE"]
+    last = ["KASOA", "MULINGE", "AWINO", "RUKENYA", "OTI", "DOE", "WANJIKU", "OCHIENG", "MUTUA", "NJERI"]
+    with conn:
+        conn.executemany("INSERT INTO students (reg_no, full_name, year) VALUES (?, ?, ?)",
+                         ((f"SIK/B/01-{i:05d}/{2000 + i % 25}", f"{first[i % 10]} {last[i // 10 % 10]}{i}",
+                           str(2000 + i % 25)) for i in range(n)))
+
+    def timed(sql, args):
+        start = time.perf_counter()
+        for _ in range(repeat):
+            rows = conn.execute(sql, args).fetchall()
+        return (time.perf_counter() - start) / repeat * 1000, len(rows)
+
+    def searched(query):
+        start = time.perf_counter()
+        for _ in range(repeat):
+            rows = search_students(query)
+        return (time.perf_counter() - start) / repeat * 1000, len(rows)
+
+    like = f"SELECT {STUDENT_COLUMNS} FROM students WHERE reg_no LIKE ? OR full_name LIKE ? LIMIT 100"
+    year = "SELECT COUNT(*) FROM students WHERE year = ?"
+    offset = f"SELECT {STUDENT_COLUMNS} FROM students ORDER BY id LIMIT 200 OFFSET ?"
+    keyset = f"SELECT {STUDENT_COLUMNS} FROM students WHERE id > ? ORDER BY id LIMIT 200"
+    print(f"{n} students, {repeat} runs each")
+    print("LIKE '%%kasoa123%%'   (scan)     %8.2f ms  %d rows" % timed(like, ("%kasoa123%", "%kasoa123%")))
+    print("LIKE '%%01-0421%%'    (scan)     %8.2f ms  %d rows" % timed(like, ("%01-0421%", "%01-0421%")))
+    print("year = '2010' count  (scan)     %8.2f ms" % timed(year, ("2010",))[:1])
+    start = time.perf_counter()
+    migrate(conn)
+    print(f"search migration                {(time.perf_counter() - start) * 1000:8.0f} ms")
+    print("year = '2010' count  (index)    %8.2f ms" % timed(year, ("2010",))[:1])
+    deep = n * 9 // 10
+    print("page at row %-6d  (OFFSET)    %8.2f ms  %d rows" % ((deep,) + timed(offset, (deep,))))
+    print("page at row %-6d  (keyset)    %8.2f ms  %d rows" % ((deep,) + timed(keyset, (deep,))))
     conn.close()
-    return result
+    saved, _pool = _pool, ConnectionPool(path)
+    try:
+        print("search 'SIK/B/01-0421'          %8.2f ms  %d rows" % searched("SIK/B/01-0421"))
+        print("search 'kasoa123'               %8.2f ms  %d rows" % searched("kasoa123"))
+        print("search 'chr kas'                %8.2f ms  %d rows" % searched("chr kas"))
+        print("search 'Mary-Jane'              %8.2f ms  %d rows" % searched("Mary-Jane"))
+    finally:
+        _pool.close()
+        _pool = saved
+
+
+if __name__ == "__main__":
+    benchmark(*(int(a) for a in sys.argv[1:2]))
@@ -0,0 +1,86 @@
+import os
+import hashlib
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+import cv2
+import numpy as np
+
+DATASET_DIR = "dataset"
+FACE_SIZE = (200, 200)
+
+# faces is one contiguous (N, H, W) uint8 array; names/paths/digests line up
+# with it row by row.
+Dataset = namedtuple("Dataset", ["faces", "names", "paths", "digests"])
+
+
+# -------------------------
+# Layout + Label Parsing
+# -------------------------
+# Two layouts live side by side in dataset/:
+#   dataset/BRIAN_RUKENYA_7.jpg                                (flat, capture_faces)
+#   dataset/BRIAN_RUKENYA/BRIAN_RUKENYA_20250415123615_11.jpg  (per-person folder)
+# Flat files drop the trailing counter; files in a folder take the folder name.
+def parse_label(path, data_dir=DATASET_DIR):
+    rel = os.path.relpath(path, data_dir)
+    parts = rel.split(os.sep)
+    if len(parts) > 1:
+        return parts[0]
+    stem = os.path.splitext(parts[0])[0]
+    return "_".join(stem.split("_")[:-1])
+
+
+def scan_dataset(data_dir=DATASET_DIR):
+    entries = []
+    for root, dirs, files in os.walk(data_dir):
+        dirs.sort()
+        for file in sorted(files):
+            if file.lower().endswith(".jpg"):
+                path = os.path.join(root, file)
+                entries.append((path, parse_label(path, data_dir)))
+    return entries
+
+
+# -------------------------
+# Parallel Decode
+# -------------------------
+# cv2.imdecode and cv2.resize release the GIL, so a thread pool decodes in
+# parallel without pickling images between processes. At most `workers * 4`
+# files are in flight at once and every face is written straight into the
+# preallocated output array, so memory stays at one copy of the dataset.
+def _decode(path, size):
+    with open(path, "rb") as f:
+        data = f.read()
+    img = cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_GRAYSCALE)
+    if img is None:
+        return None, None
+    if img.shape[::-1] != size:
+        img = cv2.resize(img, size)
+    return img, int(hashlib.sha1(data).hexdigest(), 16)
+
+
+def load_faces(paths, size=FACE_SIZE, workers=None):
+    workers = workers or min(8, os.cpu_count() or 1)
+    faces = np.empty((len(paths), size[1], size[0]), dtype=np.uint8)
+    digests = [None] * len(paths)
+    window = workers * 4
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for start in range(0, len(paths), window):
+            batch = paths[start:start + window]
+            for i, (img, digest) in enumerate(pool.map(_decode, batch, [size] * len(batch))):
+                if img is not None:
+                    faces[start + i] = img
+                    digests[start + i] = digest
+
+    ok = [i for i, digest in enumerate(digests) if digest is not None]
+    if len(ok) != len(paths):
+        faces = np.ascontiguousarray(faces[ok])
+        digests = [digests[i] for i in ok]
+    return faces, digests, ok
+
+
+def load_dataset(data_dir=DATASET_DIR, size=FACE_SIZE, workers=None):
+    entries = scan_dataset(data_dir)
+    paths = [path for path, _ in entries]
+    faces, digests, ok = load_faces(paths, size, workers)
+    return Dataset(faces, [entries[i][1] for i in ok], [paths[i] for i in ok], digests)
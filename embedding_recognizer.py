@@ -0,0 +1,151 @@
+import os
+import cv2
+import numpy as np
+
+ONNX_MODEL_PATH = "face_embedding.onnx"
+
+
+# -------------------------
+# Embedders
+# -------------------------
+# An embedder turns a batch of grayscale faces (N, H, W) into one
+# L2-normalised float32 row per face, so cosine similarity is a plain dot
+# product against the gallery matrix.
+def _normalize(vectors):
+    vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+def _uniform_lbp_table():
+    table = np.full(256, 58, dtype=np.uint8)
+    index = 0
+    for code in range(256):
+        bits = [(code >> i) & 1 for i in range(8)]
+        if sum(bits[i] != bits[(i + 1) % 8] for i in range(8)) <= 2:
+            table[code] = index
+            index += 1
+    return table
+
+
+class LBPHistogramEmbedder:
+    # Same features LBPH uses (uniform LBP, radius 1, 8 neighbours, grid of
+    # cell histograms), computed for the whole batch at once. Histograms are
+    # square-rooted before normalising, so the dot product of two embeddings
+    # is their Bhattacharyya coefficient.
+    def __init__(self, size=(100, 100), grid=(8, 8)):
+        self.size = size
+        self.grid = grid
+        self.table = _uniform_lbp_table()
+        self.dim = grid[0] * grid[1] * 59
+
+    def embed(self, faces):
+        faces = np.stack([cv2.resize(f, self.size) if f.shape[::-1] != self.size else f for f in faces])
+        img = faces.astype(np.int16)
+        center = img[:, 1:-1, 1:-1]
+        h, w = center.shape[1:]
+        codes = np.zeros(center.shape, dtype=np.uint8)
+        offsets = [(-1, -1), (-1, 0), (-1, 1), (0, 1), (1, 1), (1, 0), (1, -1), (0, -1)]
+        for bit, (dy, dx) in enumerate(offsets):
+            neighbour = img[:, 1 + dy:1 + dy + h, 1 + dx:1 + dx + w]
+            codes |= (neighbour >= center).astype(np.uint8) << bit
+        codes = self.table[codes]
+
+        gy, gx = self.grid
+        ch, cw = h // gy, w // gx
+        n = len(faces)
+        cells = codes[:, :ch * gy, :cw * gx].reshape(n, gy, ch, gx, cw).transpose(0, 1, 3, 2, 4).reshape(n, gy * gx, -1)
+        offset = (np.arange(n * gy * gx, dtype=np.int64) * 59)[:, None]
+        hist = np.bincount((cells.reshape(n * gy * gx, -1) + offset).ravel(), minlength=n * gy * gx * 59)
+        hist = hist.reshape(n, gy * gx * 59).astype(np.float32) / (ch * cw)
+        return _normalize(np.sqrt(hist))
+
+
+class OnnxEmbedder:
+    # Any face embedding network exported to ONNX that takes a (1 or N, 3, H, W)
+    # image batch and returns one vector per face (e.g. a MobileFaceNet/ArcFace
+    # export). Runs on CPU through cv2.dnn.
+    def __init__(self, model_path=ONNX_MODEL_PATH, input_size=(112, 112), mean=127.5, scale=1 / 127.5):
+        if not os.path.exists(model_path):
+            raise RuntimeError(f"Face embedding model not found at '{model_path}'")
+        self.net = cv2.dnn.readNetFromONNX(model_path)
+        self.input_size = input_size
+        self.mean = mean
+        self.scale = scale
+
+    def embed(self, faces):
+        images = [cv2.cvtColor(f, cv2.COLOR_GRAY2BGR) if f.ndim == 2 else f for f in faces]
+        blob = cv2.dnn.blobFromImages(images, self.scale, self.input_size, (self.mean,) * 3, swapRB=True)
+        self.net.setInput(blob)
+        return _normalize(self.net.forward().reshape(len(images), -1))
+
+
+def top_k(scores, labels, k):
+    k = min(k, scores.shape[1])
+    top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    top_scores = np.take_along_axis(scores, top, axis=1)
+    order = np.argsort(-top_scores, axis=1)
+    return labels[np.take_along_axis(top, order, axis=1)], np.take_along_axis(top_scores, order, axis=1)
+
+
+# -------------------------
+# Embedding Recognizer
+# -------------------------
+# Drop-in for LBPHFaceRecognizer (train/update/predict/save/read): the
+# gallery is one contiguous float32 matrix with one embedding per enrolled
+# image, and a whole batch of faces is identified with a single matrix
+# product plus top-k. predict() keeps LBPH's "lower is better" confidence,
+# here confidence_scale * (1 - cosine similarity). The default scale puts
+# same-person matches of the LBP embedder well under the `conf < 60` the
+# recognition loops use and other people above it.
+class EmbeddingRecognizer:
+    def __init__(self, embedder=None, confidence_scale=250.0):
+        self.embedder = embedder or LBPHistogramEmbedder()
+        self.confidence_scale = confidence_scale
+        self.gallery = np.empty((0, 0), dtype=np.float32)
+        self.labels = np.empty(0, dtype=np.int32)
+
+    def train(self, faces, labels):
+        self.gallery = np.empty((0, 0), dtype=np.float32)
+        self.labels = np.empty(0, dtype=np.int32)
+        self.update(faces, labels)
+
+    def update(self, faces, labels):
+        vectors = self.embed(faces)
+        self.gallery = vectors if not len(self.gallery) else np.ascontiguousarray(np.vstack([self.gallery, vectors]))
+        self.labels = np.concatenate([self.labels, np.asarray(labels, dtype=np.int32).ravel()])
+
+    def embed(self, faces, batch=256):
+        faces = list(faces)
+        return np.vstack([self.embedder.embed(faces[i:i + batch]) for i in range(0, len(faces), batch)])
+
+    def remove(self, label):
+        keep = self.labels != label
+        self.gallery = np.ascontiguousarray(self.gallery[keep])
+        self.labels = self.labels[keep]
+
+    def __len__(self):
+        return len(self.labels)
+
+    # Returns (labels, similarities), both (len(faces), k), best match first.
+    def search(self, faces, k=1):
+        return top_k(self.embed(faces) @ self.gallery.T, self.labels, k)
+
+    def predict_batch(self, faces):
+        if not len(self):
+            return [(-1, float("inf")) for _ in faces]
+        labels, scores = self.search(faces, k=1)
+        return [(int(l[0]), float(self.confidence_scale * (1.0 - s[0]))) for l, s in zip(labels, scores)]
+
+    def predict(self, face):
+        return self.predict_batch([face])[0]
+
+    def save(self, path):
+        with open(path, "wb") as f:
+            np.savez(f, gallery=self.gallery, labels=self.labels)
+
+    def read(self, path):
+        with np.load(path) as data:
+            self.gallery = np.ascontiguousarray(data["gallery"], dtype=np.float32)
+            self.labels = data["labels"].astype(np.int32)
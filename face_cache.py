@@ -0,0 +1,107 @@
+import os
+import json
+import tempfile
+import numpy as np
+import dataset_loader
+
+CACHE_PATH = "face_cache.npy"
+CACHE_VERSION = 1
+
+
+# -------------------------
+# Preprocessed Face Cache
+# -------------------------
+# Keeps every grayscale 200x200 face from dataset/ in one .npy array plus a
+# sidecar "<cache>.json" index (path, label, mtime, size, sha1 per row).
+# A training run stats the dataset, decodes only new or changed JPEGs and
+# memory-maps everything else, so an unchanged dataset costs one sequential
+# read instead of thousands of JPEG decodes.
+def index_path(cache_path=CACHE_PATH):
+    return os.path.splitext(cache_path)[0] + ".json"
+
+
+def load_index(cache_path=CACHE_PATH, size=dataset_loader.FACE_SIZE):
+    path = index_path(cache_path)
+    if not os.path.exists(path) or not os.path.exists(cache_path):
+        return []
+    with open(path, "r", encoding="utf-8") as f:
+        index = json.load(f)
+    if index.get("version") != CACHE_VERSION or index.get("size") != list(size):
+        return []
+    return index["rows"]
+
+
+def save_index(rows, cache_path=CACHE_PATH, size=dataset_loader.FACE_SIZE):
+    path = index_path(cache_path)
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump({"version": CACHE_VERSION, "size": list(size), "rows": rows}, f)
+        os.replace(tmp, path)
+    except BaseException:
+        os.remove(tmp)
+        raise
+
+
+def _stat(path):
+    st = os.stat(path)
+    return st.st_mtime_ns, st.st_size
+
+
+def load_cached_dataset(data_dir=dataset_loader.DATASET_DIR, cache_path=CACHE_PATH,
+                        size=dataset_loader.FACE_SIZE, workers=None):
+    entries = dataset_loader.scan_dataset(data_dir)
+    old_rows = load_index(cache_path, size)
+    cached = {row["path"]: (i, row) for i, row in enumerate(old_rows)}
+
+    keep, fresh, stats = {}, [], {}
+    for path, name in entries:
+        mtime, nbytes = stats[path] = _stat(path)
+        hit = cached.get(path)
+        if hit and hit[1]["mtime"] == mtime and hit[1]["bytes"] == nbytes:
+            keep[path] = hit[0]
+        else:
+            fresh.append(path)
+
+    if not entries:
+        return dataset_loader.Dataset(np.empty((0, size[1], size[0]), dtype=np.uint8), [], [], [])
+
+    # Nothing changed: hand back the mapped array as-is.
+    if not fresh and len(keep) == len(old_rows) and list(keep.values()) == list(range(len(old_rows))):
+        faces = np.load(cache_path, mmap_mode="r")
+        return dataset_loader.Dataset(faces, [r["name"] for r in old_rows], [r["path"] for r in old_rows],
+                                      [int(r["sha1"], 16) for r in old_rows])
+
+    new_faces, new_digests, ok = dataset_loader.load_faces(fresh, size, workers)
+    decoded = {fresh[i]: (new_faces[j], new_digests[j]) for j, i in enumerate(ok)}
+    names = dict(entries)
+    paths = [path for path, _ in entries if path in keep or path in decoded]
+    if not paths:
+        return dataset_loader.Dataset(new_faces, [], [], [])
+
+    old = np.load(cache_path, mmap_mode="r") if keep else None
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(cache_path)), suffix=".npy")
+    os.close(fd)
+    rows = []
+    try:
+        out = np.lib.format.open_memmap(tmp, mode="w+", dtype=np.uint8, shape=(len(paths), size[1], size[0]))
+        for i, path in enumerate(paths):
+            if path in keep:
+                out[i] = old[keep[path]]
+                sha1 = old_rows[keep[path]]["sha1"]
+            else:
+                face, digest = decoded[path]
+                out[i] = face
+                sha1 = format(digest, "040x")
+            mtime, nbytes = stats[path]
+            rows.append({"path": path, "name": names[path], "mtime": mtime, "bytes": nbytes, "sha1": sha1})
+        out.flush()
+        del out, old
+        os.replace(tmp, cache_path)
+    except BaseException:
+        os.remove(tmp)
+        raise
+    save_index(rows, cache_path, size)
+
+    faces = np.load(cache_path, mmap_mode="r")
+    return dataset_loader.Dataset(faces, [r["name"] for r in rows], paths, [int(r["sha1"], 16) for r in rows])
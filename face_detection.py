@@ -0,0 +1,160 @@
+import os
+import cv2
+import numpy as np
+from face_tracker import iou
+
+CASCADE_PATH = cv2.data.haarcascades + "haarcascade_frontalface_default.xml"
+LBP_CASCADE_PATH = "lbpcascade_frontalface_improved.xml"
+YUNET_MODEL_PATH = "face_detection_yunet_2023mar.onnx"
+FACE_SIZE = (200, 200)
+
+# Which backend a site runs is picked here (or per detector), never in the
+# capture/recognition loops: "haar", "lbp" or "yunet".
+DEFAULT_BACKEND = os.environ.get("SMARTFACE_DETECTOR", "haar")
+
+
+# -------------------------
+# Cascade + Face Cropping
+# -------------------------
+# An empty CascadeClassifier (wrong path, missing file) never finds a face
+# and raises nothing, so refuse it at startup instead.
+def create_cascade(path=CASCADE_PATH):
+    cascade = cv2.CascadeClassifier(path)
+    if cascade.empty():
+        raise RuntimeError(f"Could not load face cascade from '{path}'")
+    return cascade
+
+
+def crop_and_resize_face(gray, x, y, w, h, size=FACE_SIZE):
+    face = gray[y:y+h, x:x+w]
+    return cv2.resize(face, size)
+
+
+# -------------------------
+# Detector Backends
+# -------------------------
+# Every backend takes a list of frames (gray or BGR) and returns one list of
+# (x, y, w, h) boxes per frame, no smaller than min_size (None keeps the
+# model's own minimum). The constructor runs the backend once on a blank
+# frame so a broken model fails at startup, not in the first loop.
+class CascadeBackend:
+    def __init__(self, path=CASCADE_PATH, scale_factor=1.3, min_neighbors=5):
+        self.cascade = create_cascade(path)
+        self.scale_factor = scale_factor
+        self.min_neighbors = min_neighbors
+        self.detect([np.zeros((64, 64), np.uint8)])
+
+    def detect(self, frames, min_size=None):
+        boxes = []
+        for frame in frames:
+            if frame.ndim == 3:
+                frame = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+            found = self.cascade.detectMultiScale(frame, self.scale_factor, self.min_neighbors,
+                                                  minSize=min_size or (0, 0))
+            boxes.append([tuple(int(v) for v in box) for box in found])
+        return boxes
+
+
+class YuNetBackend:
+    def __init__(self, model_path=YUNET_MODEL_PATH, score_threshold=0.9, nms_threshold=0.3, top_k=50):
+        if not os.path.exists(model_path):
+            raise RuntimeError(f"YuNet model not found at '{model_path}'")
+        self.net = cv2.FaceDetectorYN.create(model_path, "", (320, 320), score_threshold, nms_threshold, top_k)
+        self.input_size = (320, 320)
+        self.detect([np.zeros((64, 64, 3), np.uint8)])
+
+    def detect(self, frames, min_size=None):
+        min_size = min_size or (0, 0)
+        boxes = []
+        for frame in frames:
+            if frame.ndim == 2:
+                frame = cv2.cvtColor(frame, cv2.COLOR_GRAY2BGR)
+            size = (frame.shape[1], frame.shape[0])
+            if size != self.input_size:
+                self.net.setInputSize(size)
+                self.input_size = size
+            _, found = self.net.detect(frame)
+            result = []
+            for row in (found if found is not None else []):
+                x, y, w, h = (int(v) for v in row[:4])
+                if w >= min_size[0] and h >= min_size[1]:
+                    result.append((max(0, x), max(0, y), w, h))
+            boxes.append(result)
+        return boxes
+
+
+def create_backend(name=None, scale_factor=1.3, min_neighbors=5, cascade_path=None,
+                   model_path=YUNET_MODEL_PATH, score_threshold=0.9):
+    name = name or DEFAULT_BACKEND
+    if name == "haar":
+        return CascadeBackend(cascade_path or CASCADE_PATH, scale_factor, min_neighbors)
+    if name == "lbp":
+        return CascadeBackend(cascade_path or LBP_CASCADE_PATH, scale_factor, min_neighbors)
+    if name == "yunet":
+        return YuNetBackend(model_path, score_threshold)
+    raise ValueError(f"Unknown face detector backend '{name}'")
+
+
+# -------------------------
+# Downscaled / ROI Detection
+# -------------------------
+# Runs the backend on a copy of the frame shrunk by `scale` and maps the
+# boxes back to full resolution, so crop_and_resize_face still cuts the
+# face out of the full-size image. min_size is given in full-resolution
+# pixels. Both are opt-in: by default the frame is searched at full size
+# down to the cascade's own minimum face, like a plain detectMultiScale
+# call. Shrinking also raises the smallest face found (a 24 px cascade
+# window at scale=0.5 is 48 px in the frame). With roi_refresh=N the
+# detector only searches windows around the previous frame's boxes (grown
+# by roi_margin on each side) and does a full frame scan every N frames,
+# or as soon as the windows come back empty.
+# `backend` is a backend object or a name for create_backend(); any other
+# keyword arguments go to create_backend().
+class FaceDetector:
+    def __init__(self, backend=None, scale=1.0, min_size=None, roi_refresh=0, roi_margin=0.5,
+                 **backend_options):
+        if backend is None or isinstance(backend, str):
+            backend = create_backend(backend, **backend_options)
+        self.backend = backend
+        self.scale = scale
+        self.min_size = min_size
+        self.roi_refresh = roi_refresh
+        self.roi_margin = roi_margin
+        self.previous = []
+        self.frame_count = 0
+
+    def detect(self, gray):
+        self.frame_count += 1
+        if self.roi_refresh and self.previous and self.frame_count % self.roi_refresh:
+            boxes = self._detect_rois(gray)
+        else:
+            boxes = self._detect_scaled(gray)
+        self.previous = boxes
+        return boxes
+
+    def reset(self):
+        self.previous = []
+        self.frame_count = 0
+
+    def _detect_scaled(self, gray, ox=0, oy=0):
+        scale = self.scale
+        small = gray if scale == 1 else cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+        min_size = None
+        if self.min_size:
+            min_size = (max(1, int(self.min_size[0] * scale)), max(1, int(self.min_size[1] * scale)))
+            if small.shape[0] < min_size[1] or small.shape[1] < min_size[0]:
+                return []
+        found = self.backend.detect([small], min_size)[0]
+        return [(int(x / scale) + ox, int(y / scale) + oy, int(w / scale), int(h / scale)) for (x, y, w, h) in found]
+
+    def _detect_rois(self, gray):
+        height, width = gray.shape[:2]
+        boxes = []
+        for (x, y, w, h) in self.previous:
+            mx, my = int(w * self.roi_margin), int(h * self.roi_margin)
+            x0, y0 = max(0, x - mx), max(0, y - my)
+            x1, y1 = min(width, x + w + mx), min(height, y + h + my)
+            for box in self._detect_scaled(gray[y0:y1, x0:x1], x0, y0):
+                if all(iou(box, other) < 0.5 for other in boxes):
+                    boxes.append(box)
+        return boxes
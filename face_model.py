@@ -0,0 +1,243 @@
+import os
+import json
+import hashlib
+import tempfile
+import shutil
+import cv2
+import numpy as np
+import dataset_loader
+import face_cache
+import embedding_recognizer
+import ann_index
+import prototypes
+
+DATASET_DIR = "dataset"
+
+# "lbph" (cv2.face LBPH), "embedding" (LBP-histogram embeddings), "onnx"
+# (embeddings from a local ONNX model) or "ann" (LBP-histogram embeddings in
+# an IVF index, for large galleries). All of them share the LBPH interface.
+RECOGNIZER_BACKEND = os.environ.get("SMARTFACE_RECOGNIZER", "lbph")
+MODEL_PATHS = {"lbph": "trainer.yml", "embedding": "trainer_embeddings.npz",
+               "onnx": "trainer_embeddings.npz", "ann": "trainer_ann"}
+MODEL_PATH = MODEL_PATHS.get(RECOGNIZER_BACKEND, "trainer.yml")
+MANIFEST_VERSION = 1
+
+
+# -------------------------
+# Recognizer
+# -------------------------
+# Always hand out a fresh instance: reading a yml into a recognizer that has
+# already been trained leaves stale label storage behind, and predictions for
+# samples added by a later update() come back with garbage labels.
+def create_recognizer(backend=RECOGNIZER_BACKEND):
+    if backend == "lbph":
+        return cv2.face.LBPHFaceRecognizer_create()
+    if backend == "embedding":
+        return embedding_recognizer.EmbeddingRecognizer()
+    if backend == "onnx":
+        return embedding_recognizer.EmbeddingRecognizer(embedding_recognizer.OnnxEmbedder())
+    if backend == "ann":
+        return ann_index.IndexedRecognizer()
+    raise ValueError(f"Unknown recognizer backend '{backend}'")
+
+
+def load_recognizer(model_path=MODEL_PATH, backend=RECOGNIZER_BACKEND):
+    recognizer = create_recognizer(backend)
+    recognizer.read(model_path)
+    return recognizer
+
+
+# -------------------------
+# Label Manifest
+# -------------------------
+# Every model file gets a sidecar "<model>.labels.json" holding one entry per
+# person: id, name, reg_no, image count and a content hash of their images.
+# Recognition reads only this file, never the dataset directory.
+def manifest_path(model_path=MODEL_PATH):
+    return os.path.splitext(model_path)[0] + ".labels.json"
+
+
+def file_digest(data):
+    return int(hashlib.sha1(data).hexdigest(), 16)
+
+
+# Per-person hash is the sum of the sha1 of each image, so adding images to
+# an existing person only needs the new files.
+def combine_digests(digests, start="0"):
+    total = int(start, 16)
+    for digest in digests:
+        total = (total + digest) % (1 << 160)
+    return format(total, "040x")
+
+
+def load_manifest(model_path=MODEL_PATH):
+    path = manifest_path(model_path)
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        manifest = json.load(f)
+    if manifest.get("version") != MANIFEST_VERSION:
+        return None
+    return manifest
+
+
+def save_manifest(people, model_path=MODEL_PATH):
+    old = load_manifest(model_path)
+    manifest = {
+        "version": MANIFEST_VERSION,
+        "revision": old["revision"] + 1 if old else 1,
+        "model": os.path.basename(model_path),
+        "people": sorted(people, key=lambda p: p["id"]),
+    }
+    path = manifest_path(model_path)
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(tmp, path)
+    except BaseException:
+        os.remove(tmp)
+        raise
+    return manifest
+
+
+def label_names(model_path=MODEL_PATH):
+    manifest = load_manifest(model_path)
+    if manifest is None:
+        return {}
+    return {p["id"]: p["name"] for p in manifest["people"]}
+
+
+def load_label_map(model_path=MODEL_PATH):
+    return {name: id_ for id_, name in label_names(model_path).items()}
+
+
+def dataset_names(data_dir=DATASET_DIR):
+    return {name for _, name in dataset_loader.scan_dataset(data_dir)}
+
+
+# -------------------------
+# Full Rebuild
+# -------------------------
+# With per_person set, only that many prototypes per person go into the
+# model (see prototypes.select_prototypes); the manifest still counts every
+# image.
+def train_full(data_dir=DATASET_DIR, model_path=MODEL_PATH, reg_nos=None,
+               per_person=prototypes.PROTOTYPES_PER_PERSON):
+    old = load_manifest(model_path)
+    known_reg_nos = {p["name"]: p["reg_no"] for p in old["people"]} if old else {}
+    known_reg_nos.update(reg_nos or {})
+
+    data = face_cache.load_cached_dataset(data_dir)
+    if not len(data.faces):
+        # Nobody left to train on: drop the old model and empty the manifest
+        # so a deleted identity can no longer be recognised.
+        if os.path.isdir(model_path):
+            shutil.rmtree(model_path)
+        elif os.path.exists(model_path):
+            os.remove(model_path)
+        if old:
+            save_manifest([], model_path)
+        return {}
+
+    labels = []
+    people = {}
+    for name, digest in zip(data.names, data.digests):
+        if name not in people:
+            people[name] = {"id": len(people), "name": name,
+                            "reg_no": known_reg_nos.get(name), "digests": []}
+        people[name]["digests"].append(digest)
+        labels.append(people[name]["id"])
+
+    labels = np.array(labels, dtype=np.int32)
+    keep = prototypes.select_prototypes(data.faces, labels, per_person)
+    recognizer = create_recognizer()
+    recognizer.train([data.faces[i] for i in keep], labels[keep])
+    recognizer.save(model_path)
+    save_manifest([
+        {"id": p["id"], "name": p["name"], "reg_no": p["reg_no"],
+         "images": len(p["digests"]), "hash": combine_digests(p["digests"])}
+        for p in people.values()
+    ], model_path)
+    return {name: p["id"] for name, p in people.items()}
+
+
+# -------------------------
+# Incremental Update
+# -------------------------
+# Adds the freshly captured images of one person to the saved model with
+# LBPHFaceRecognizer.update(), so registering a student does not re-read the
+# whole dataset. Falls back to train_full() when there is no usable model yet
+# or when someone in the manifest no longer has images on disk.
+def train_incremental(name, image_paths, data_dir=DATASET_DIR, model_path=MODEL_PATH, reg_no=None,
+                      per_person=prototypes.PROTOTYPES_PER_PERSON):
+    manifest = load_manifest(model_path)
+    reg_nos = {name: reg_no} if reg_no else None
+    if not os.path.exists(model_path) or not manifest or not manifest["people"]:
+        return train_full(data_dir, model_path, reg_nos, per_person)
+    people = {p["name"]: p for p in manifest["people"]}
+    if not set(people) <= dataset_names(data_dir):
+        return train_full(data_dir, model_path, reg_nos, per_person)
+
+    faces, digests, _ = dataset_loader.load_faces(list(image_paths))
+    if not len(faces):
+        return {n: p["id"] for n, p in people.items()}
+
+    if name not in people:
+        people[name] = {"id": max(p["id"] for p in people.values()) + 1, "name": name,
+                        "reg_no": None, "images": 0, "hash": combine_digests([])}
+    person = people[name]
+    if reg_no:
+        person["reg_no"] = reg_no
+    person["images"] += len(faces)
+    person["hash"] = combine_digests(digests, person["hash"])
+
+    keep = prototypes.select_prototypes(faces, np.zeros(len(faces)), per_person)
+    recognizer = load_recognizer(model_path)
+    recognizer.update([faces[i] for i in keep], np.full(len(keep), person["id"], dtype=np.int32))
+    recognizer.save(model_path)
+    save_manifest(list(people.values()), model_path)
+    return {n: p["id"] for n, p in people.items()}
+
+
+# -------------------------
+# Delete / Rename
+# -------------------------
+# Label ids are handed out in insertion order and LBPH cannot forget samples,
+# so removing or renaming a person triggers a full rebuild. Embedding
+# recognizers can drop a label in place, so deletes stay incremental there.
+def delete_person(name, data_dir=DATASET_DIR, model_path=MODEL_PATH):
+    removed = 0
+    for path, label in dataset_loader.scan_dataset(data_dir):
+        if label == name:
+            os.remove(path)
+            removed += 1
+    folder = os.path.join(data_dir, name)
+    if os.path.isdir(folder):
+        shutil.rmtree(folder)
+
+    manifest = load_manifest(model_path)
+    people = {p["name"]: p for p in manifest["people"]} if manifest else {}
+    if not removed and name not in people:
+        return {n: p["id"] for n, p in people.items()}
+    if name in people and os.path.exists(model_path):
+        recognizer = load_recognizer(model_path)
+        if hasattr(recognizer, "remove"):
+            recognizer.remove(people.pop(name)["id"])
+            recognizer.save(model_path)
+            save_manifest(list(people.values()), model_path)
+            return {n: p["id"] for n, p in people.items()}
+    return train_full(data_dir, model_path)
+
+
+def rename_person(old_name, new_name, data_dir=DATASET_DIR, model_path=MODEL_PATH):
+    manifest = load_manifest(model_path) or {"people": []}
+    reg_no = next((p["reg_no"] for p in manifest["people"] if p["name"] == old_name), None)
+    for file in os.listdir(data_dir):
+        path = os.path.join(data_dir, file)
+        if os.path.isfile(path) and dataset_loader.parse_label(path, data_dir) == old_name:
+            os.rename(path, os.path.join(data_dir, new_name + file[len(old_name):]))
+    folder = os.path.join(data_dir, old_name)
+    if os.path.isdir(folder):
+        os.rename(folder, os.path.join(data_dir, new_name))
+    return train_full(data_dir, model_path, {new_name: reg_no} if reg_no else None)
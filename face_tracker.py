@@ -0,0 +1,116 @@
+import itertools
+
+
+# -------------------------
+# Track-then-Recognize
+# -------------------------
+# Matches each frame's face boxes to the boxes seen in earlier frames (IoU,
+# falling back to centroid distance) so every face keeps a track id. The
+# LBPH result is cached per track and predict only runs again when the
+# track is new, every `repredict_every` frames, or when the last two
+# confidences disagree by more than `drift`.
+def iou(a, b):
+    ax, ay, aw, ah = a
+    bx, by, bw, bh = b
+    ix = max(0, min(ax + aw, bx + bw) - max(ax, bx))
+    iy = max(0, min(ay + ah, by + bh) - max(ay, by))
+    inter = ix * iy
+    union = aw * ah + bw * bh - inter
+    return inter / union if union else 0.0
+
+
+def centroid_distance(a, b):
+    ax, ay, aw, ah = a
+    bx, by, bw, bh = b
+    dx = (ax + aw / 2) - (bx + bw / 2)
+    dy = (ay + ah / 2) - (by + bh / 2)
+    return (dx * dx + dy * dy) ** 0.5
+
+
+class Track:
+    def __init__(self, track_id, box):
+        self.id = track_id
+        self.box = box
+        self.label = None
+        self.confidence = None
+        self.age = 0
+        self.missed = 0
+        self.since_predict = None
+        self.unstable = False
+
+    def due(self, repredict_every):
+        return self.since_predict is None or self.unstable or self.since_predict >= repredict_every
+
+    def record(self, label, confidence, drift):
+        self.unstable = (self.confidence is not None and
+                         (label != self.label or abs(confidence - self.confidence) > drift))
+        self.label = label
+        self.confidence = confidence
+        self.since_predict = 0
+
+
+class FaceTracker:
+    def __init__(self, repredict_every=10, iou_threshold=0.3, max_missed=5, drift=15.0):
+        self.repredict_every = repredict_every
+        self.iou_threshold = iou_threshold
+        self.max_missed = max_missed
+        self.drift = drift
+        self.tracks = []
+        self._ids = itertools.count(1)
+        self.predicts = 0
+        self.skipped = 0
+
+    # Returns the tracks matched to this frame's boxes, in box order.
+    def update(self, boxes):
+        boxes = [tuple(int(v) for v in box) for box in boxes]
+        pairs = []
+        for i, box in enumerate(boxes):
+            for track in self.tracks:
+                score = iou(box, track.box)
+                if score < self.iou_threshold:
+                    # Fast movers: accept a centroid within half a face width
+                    if centroid_distance(box, track.box) > max(box[2], track.box[2]) / 2:
+                        continue
+                    score = self.iou_threshold * 0.5
+                pairs.append((score, i, track))
+        pairs.sort(key=lambda p: p[0], reverse=True)
+
+        matched, used = {}, set()
+        for score, i, track in pairs:
+            if i in matched or track.id in used:
+                continue
+            matched[i] = track
+            used.add(track.id)
+
+        for track in self.tracks:
+            if track.id not in used:
+                track.missed += 1
+        self.tracks = [t for t in self.tracks if t.missed <= self.max_missed]
+
+        result = []
+        for i, box in enumerate(boxes):
+            track = matched.get(i)
+            if track is None:
+                track = Track(next(self._ids), box)
+                self.tracks.append(track)
+            else:
+                track.box = box
+                track.missed = 0
+                track.age += 1
+                if track.since_predict is not None:
+                    track.since_predict += 1
+            result.append(track)
+        return result
+
+    def due(self, track):
+        if track.due(self.repredict_every):
+            self.predicts += 1
+            return True
+        self.skipped += 1
+        return False
+
+    def record(self, track, label, confidence):
+        track.record(label, confidence, self.drift)
+
+    def reset(self):
+        self.tracks = []
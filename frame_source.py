@@ -0,0 +1,100 @@
+import time
+import threading
+import cv2
+
+
+# -------------------------
+# Threaded Frame Source
+# -------------------------
+# Grabs frames on a background thread and keeps only the newest one, so a
+# slow detect/imshow step never leaves the loop working on stale frames from
+# the driver buffer. read() has the same (ret, frame) shape as
+# cv2.VideoCapture.read() and blocks until a frame newer than the last one
+# returned is available. With keep_all=True (for video files, where every
+# frame counts and nothing runs in real time) the thread waits for each
+# frame to be read before grabbing the next, so none are dropped.
+class FrameSource:
+    def __init__(self, source=0, backend=None, keep_all=False):
+        self.source = source
+        self.keep_all = keep_all
+        self.cap = cv2.VideoCapture(source) if backend is None else cv2.VideoCapture(source, backend)
+        self.frame = None
+        self.timestamp = 0.0
+        self.frame_id = 0
+        self.grabbed = 0
+        self.dropped = 0
+        self.read_id = 0
+        self.read_timestamp = 0.0
+        self._running = False
+        self._cond = threading.Condition()
+        self._thread = None
+
+    def isOpened(self):
+        return self.cap.isOpened()
+
+    @property
+    def running(self):
+        return self._running
+
+    def start(self):
+        if self._running:
+            return self
+        self._running = True
+        self._thread = threading.Thread(target=self._loop, name=f"FrameSource({self.source})", daemon=True)
+        self._thread.start()
+        return self
+
+    def _loop(self):
+        while self._running:
+            if self.keep_all:
+                with self._cond:
+                    self._cond.wait_for(lambda: self.frame_id <= self.read_id or not self._running)
+                    if not self._running:
+                        break
+            ret, frame = self.cap.read()
+            with self._cond:
+                if not ret:
+                    self._running = False
+                    self._cond.notify_all()
+                    break
+                if self.frame_id > self.read_id:
+                    self.dropped += 1
+                self.frame = frame
+                self.timestamp = time.monotonic()
+                self.frame_id += 1
+                self.grabbed += 1
+                self._cond.notify_all()
+
+    def read(self, timeout=5.0):
+        with self._cond:
+            self._cond.wait_for(lambda: self.frame_id > self.read_id or not self._running, timeout)
+            if self.frame_id <= self.read_id:
+                return False, None
+            self.read_id = self.frame_id
+            self.read_timestamp = self.timestamp
+            if self.keep_all:
+                self._cond.notify_all()
+            return True, self.frame
+
+    def latest(self):
+        with self._cond:
+            return self.frame, self.timestamp, self.frame_id
+
+    def stats(self):
+        with self._cond:
+            return {"grabbed": self.grabbed, "dropped": self.dropped,
+                    "age": time.monotonic() - self.timestamp if self.frame_id else None}
+
+    def release(self):
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=2.0)
+        self.cap.release()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.release()
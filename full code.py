@@ -1,18 +1,32 @@
 import os
 import cv2
 import sqlite3
+import database
 import tkinter as tk
 from tkinter import messagebox, Toplevel, ttk
 from PIL import Image, ImageTk
-import numpy as np
-import bcrypt
-import pyttsx3
+import threading
+import time
+import auth
+from datetime import datetime
+import speech
+import access_log
+import face_model
+import face_detection
+from face_detection import crop_and_resize_face
+from recognition_loop import RecognitionLoop
+from video_widget import VideoView, VideoSink, CameraFeed
+from prototypes import DuplicateFilter
 
 # -------------------------
 # Setup
 # -------------------------
-face_cascade = cv2.CascadeClassifier("haarcascade_frontalface_default.xml")
-recognizer = cv2.face.LBPHFaceRecognizer_create()
+# A FaceDetector tracks the previous frame's boxes, so each camera loop or
+# feed gets its own instead of sharing one across threads.
+def new_face_detector():
+    return face_detection.FaceDetector(scale_factor=1.3, min_neighbors=5, roi_refresh=5)
+
+recognizer = face_model.create_recognizer()
 
 if not os.path.exists("dataset"):
     os.makedirs("dataset")
@@ -20,80 +34,70 @@ if not os.path.exists("dataset"):
 # -------------------------
 # DB Setup
 # -------------------------
-def connect_db():
-    conn = sqlite3.connect("face_recognition.db")
-    cursor = conn.cursor()
-    cursor.execute('''CREATE TABLE IF NOT EXISTS users (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        username TEXT UNIQUE,
-        password TEXT
-    )''')
-    cursor.execute('''CREATE TABLE IF NOT EXISTS students (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        name TEXT,
-        regno TEXT,
-        year TEXT
-    )''')
-    conn.commit()
-    return conn
-
-# -------------------------
-# Face Cropping + Resizing
-# -------------------------
-def crop_and_resize_face(gray, x, y, w, h):
-    face = gray[y:y+h, x:x+w]
-    resized = cv2.resize(face, (200, 200))
-    return resized
+database.create_tables()
 
 # -------------------------
 # Capture Faces
 # -------------------------
-def capture_faces(name):
-    cap = cv2.VideoCapture(0)
-    count = 0
-
-    while True:
-        ret, frame = cap.read()
-        if not ret:
-            break
-        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-        faces = face_cascade.detectMultiScale(gray, 1.3, 5)
+# The camera is read and faces are saved on a CameraFeed worker thread; the
+# window only shows the live view. done(paths) runs on the Tk thread once
+# 20 images are saved, Stop is pressed or CAPTURE_TIMEOUT seconds pass.
+CAPTURE_TIMEOUT = 60.0
 
-        for (x, y, w, h) in faces:
+def capture_faces(name, done):
+    win = Toplevel()
+    win.title("Capturing Faces")
+    view = VideoView(win)
+    view.pack(padx=10, pady=10)
+    status = tk.Label(win, text="Look at the camera", font=("Arial", 12))
+    status.pack()
+    face_detector = new_face_detector()
+    duplicates = DuplicateFilter()
+    paths = []
+    deadline = time.monotonic() + CAPTURE_TIMEOUT
+
+    def process(frame):
+        if len(paths) >= 20 or time.monotonic() > deadline:
+            return None
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        boxes = []
+        for (x, y, w, h) in face_detector.detect(gray):
             face = crop_and_resize_face(gray, x, y, w, h)
-            count += 1
-            cv2.imwrite(f"dataset/{name}_{count}.jpg", face)
-            cv2.rectangle(frame, (x, y), (x+w, y+h), (0, 255, 0), 2)
-
-        cv2.imshow("Capturing Faces - Q to quit", frame)
-        if cv2.waitKey(1) & 0xFF == ord('q') or count >= 20:
-            break
+            if duplicates.accept(face):
+                path = f"dataset/{name}_{len(paths) + 1}.jpg"
+                cv2.imwrite(path, face)
+                paths.append(path)
+                view.call_soon(status.config, {"text": f"Captured {len(paths)} / 20"})
+            boxes.append((x, y, w, h, f"Image {len(paths)}", True))
+        return boxes
+
+    def finish(opened):
+        win.destroy()
+        if not opened:
+            messagebox.showerror("Error", "Could not open the camera")
+            return
+        messagebox.showinfo("Done", f"Captured {len(paths)} images for {name}")
+        done(paths)
 
-    cap.release()
-    cv2.destroyAllWindows()
-    messagebox.showinfo("Done", f"Captured {count} images for {name}")
+    feed = CameraFeed(view, process, 0, finish).start()
+    tk.Button(win, text="Stop", command=feed.stop).pack(pady=5)
+    win.protocol("WM_DELETE_WINDOW", feed.stop)
 
 # -------------------------
 # Train Model
 # -------------------------
 def train_model():
-    faces, labels = [], []
-    label_map, label_id = {}, 0
-
-    for file in os.listdir("dataset"):
-        if file.endswith(".jpg"):
-            path = os.path.join("dataset", file)
-            img = cv2.imread(path, cv2.IMREAD_GRAYSCALE)
-            name = "_".join(file.split("_")[:-1])
-            if name not in label_map:
-                label_map[name] = label_id
-                label_id += 1
-            faces.append(img)
-            labels.append(label_map[name])
-
-    if faces:
-        recognizer.train(faces, np.array(labels))
-        recognizer.save("trainer.yml")
+    global recognizer
+    if face_model.train_full():
+        recognizer = face_model.load_recognizer()
+        messagebox.showinfo("Training", "Training completed.")
+    else:
+        messagebox.showwarning("Warning", "No data to train.")
+
+def update_model(name, paths, reg_no=None):
+    global recognizer
+    if face_model.train_incremental(name, paths, reg_no=reg_no):
+        recognizer = face_model.load_recognizer()
         messagebox.showinfo("Training", "Training completed.")
     else:
         messagebox.showwarning("Warning", "No data to train.")
@@ -101,59 +105,92 @@ def train_model():
 # -------------------------
 # Recognize Face
 # -------------------------
+# The loop runs on a worker thread and draws into a VideoView, so Tk keeps
+# handling its own windows while the camera is on. Closing `win` stops it,
+# and the view's timer stops with the loop.
+def run_loop_in(win, view, loop):
+    def worker():
+        try:
+            loop.run()
+        except RuntimeError as e:
+            view.call_soon(messagebox.showerror, "Error", str(e))
+        finally:
+            view.call_soon(view.stop)
+    win.bind("<Destroy>", lambda e: loop.stop() if e.widget is win else None, add="+")
+    threading.Thread(target=worker, name="recognition", daemon=True).start()
+    view.start()
+
 def recognize_faces():
-    if not os.path.exists("trainer.yml"):
+    global recognizer
+    if not os.path.exists(face_model.MODEL_PATH):
         messagebox.showerror("Error", "Train the model first.")
         return
 
-    recognizer.read("trainer.yml")
-    cap = cv2.VideoCapture(0)
-
-    label_map = {}
-    i = 0
-    for file in os.listdir("dataset"):
-        if file.endswith(".jpg"):
-            name = "_".join(file.split("_")[:-1])
-            if name not in label_map.values():
-                label_map[i] = name
-                i += 1
-
-    while True:
-        ret, frame = cap.read()
-        if not ret:
-            break
-        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-        faces = face_cascade.detectMultiScale(gray, 1.3, 5)
+    win = Toplevel()
+    win.title("Face Recognition")
+    view = VideoView(win)
+    view.pack(padx=10, pady=10)
+    tk.Button(win, text="Stop", command=win.destroy).pack(pady=5)
 
-        for (x, y, w, h) in faces:
-            face = crop_and_resize_face(gray, x, y, w, h)
-            id_, conf = recognizer.predict(face)
-            if conf < 60:
-                name = label_map.get(id_, "Unknown")
-                cv2.rectangle(frame, (x,y), (x+w,y+h), (0,255,0), 2)
-                cv2.putText(frame, f"{name}", (x, y-10), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0,255,0), 2)
-                speak(f"Access granted. Welcome {name}")
-                show_access_granted(name)
-                cap.release()
-                cv2.destroyAllWindows()
-                return
-            else:
-                cv2.putText(frame, "Unknown", (x,y-10), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0,0,255), 2)
+    def on_event(event):
+        if event.kind == "granted":
+            win.destroy()
+            speak(f"Access granted. Welcome {event.name}", key=event.name)
+            show_access_granted(event.name)
 
-        cv2.imshow("Face Recognition", frame)
-        if cv2.waitKey(1) & 0xFF == ord('q'):
-            break
+    recognizer = face_model.load_recognizer()
+    loop = RecognitionLoop(0, recognizer, face_model.label_names(), new_face_detector(),
+                           [VideoSink(view, on_event), access_log.get_writer()], stop_on_grant=True)
+    run_loop_in(win, view, loop)
 
-    cap.release()
-    cv2.destroyAllWindows()
+# -------------------------
+# Continuous Recognition
+# -------------------------
+# Keeps the camera open for a queue of people: every face in every frame is
+# recognized, each person is granted at most once per ACCESS_COOLDOWN
+# seconds, and decisions land in one log window instead of a popup each.
+ACCESS_COOLDOWN = 10.0
+
+def recognize_continuous():
+    if not os.path.exists(face_model.MODEL_PATH):
+        messagebox.showerror("Error", "Train the model first.")
+        return
+
+    win = Toplevel()
+    win.title("Access Log")
+    view = VideoView(win, size=(480, 360))
+    view.pack(side=tk.LEFT, padx=10, pady=10)
+    panel = tk.Frame(win)
+    panel.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+    status = tk.Label(panel, text="Waiting...", font=("Arial", 16, "bold"), width=24, bg="gray", fg="white")
+    status.pack(pady=10)
+    log = tk.Listbox(panel, width=50)
+    log.pack(fill=tk.BOTH, expand=True, padx=10, pady=5)
+    tk.Button(panel, text="Stop", command=win.destroy).pack(pady=10)
+
+    def on_event(event):
+        stamp = datetime.fromtimestamp(event.timestamp).strftime("%H:%M:%S")
+        if event.kind == "granted":
+            name = event.name.replace("_", " ")
+            status.config(text=f"Welcome, {name}", bg="green")
+            speak(f"Access granted. Welcome {name}", key=event.name)
+        else:
+            name = "Unknown"
+            status.config(text="Access Denied", bg="red")
+        log.insert(0, f"{stamp}  {name}  ({event.confidence:.0f})")
+        log.delete(100, tk.END)
+
+    recognizer = face_model.load_recognizer()
+    loop = RecognitionLoop(0, recognizer, face_model.label_names(), new_face_detector(),
+                           [VideoSink(view, on_event), access_log.get_writer()], cooldown=ACCESS_COOLDOWN)
+    run_loop_in(win, view, loop)
 
 # -------------------------
 # Voice Greeting
 # -------------------------
-def speak(text):
-    engine = pyttsx3.init()
-    engine.say(text)
-    engine.runAndWait()
+# Queued on the speech worker thread; never blocks the camera loop.
+def speak(text, key=None):
+    speech.speak(text, key)
 
 # -------------------------
 # Show Access Granted
@@ -202,14 +239,10 @@ def user_details_form():
         if not all([name, reg, year]):
             messagebox.showwarning("Missing", "All fields required.")
             return
-        conn = connect_db()
-        cursor = conn.cursor()
-        cursor.execute("INSERT INTO students (name, regno, year) VALUES (?, ?, ?)", (name, reg, year))
-        conn.commit()
-        conn.close()
-        capture_faces(name.replace(" ", "_"))
-        train_model()
+        database.add_student(reg, name, year)
+        label = name.replace(" ", "_")
         form.destroy()
+        capture_faces(label, lambda paths: update_model(label, paths, reg))
 
     tk.Button(form, text="Register", command=save_user).pack(pady=20)
     tk.Button(form, text="Back", command=form.destroy).pack()
@@ -220,17 +253,43 @@ def user_details_form():
 def open_dashboard():
     dash = Toplevel()
     dash.title("Admin Dashboard")
-    dash.geometry("300x300")
-
-    ttk.Button(dash, text="Register Student", command=user_details_form).pack(pady=10)
-    ttk.Button(dash, text="Face Detect", command=recognize_faces).pack(pady=10)
-    ttk.Button(dash, text="Train Model", command=train_model).pack(pady=10)
-    ttk.Button(dash, text="Exit", command=dash.destroy).pack(pady=10)
+    dash.geometry("300x400")
+
+    # Each action checks the session token; an expired session goes back to
+    # the login screen instead of running it.
+    def guarded(action):
+        def run():
+            if auth.session.valid("admin"):
+                action()
+            else:
+                messagebox.showwarning("Session expired", "Please log in again")
+                dash.destroy()
+                login_screen()
+        return run
+
+    # Leaving the dashboard any way ends the session, so the next person at
+    # the terminal has to log in again.
+    def logout():
+        auth.session.end()
+        dash.destroy()
+
+    ttk.Button(dash, text="Register Student", command=guarded(user_details_form)).pack(pady=10)
+    ttk.Button(dash, text="Face Detect", command=guarded(recognize_faces)).pack(pady=10)
+    ttk.Button(dash, text="Continuous Mode", command=guarded(recognize_continuous)).pack(pady=10)
+    ttk.Button(dash, text="Train Model", command=guarded(train_model)).pack(pady=10)
+    ttk.Button(dash, text="Logout", command=logout).pack(pady=10)
+    ttk.Button(dash, text="Exit", command=logout).pack(pady=10)
+    dash.protocol("WM_DELETE_WINDOW", logout)
 
 # -------------------------
 # Auth Screens
 # -------------------------
 def login_screen():
+    # While the last login's session is still valid the dashboard opens
+    # straight away, without another bcrypt check.
+    if auth.session.valid("admin"):
+        open_dashboard()
+        return
     win = Toplevel()
     win.title("Login")
     win.geometry("300x250")
@@ -243,21 +302,32 @@ def login_screen():
     pass_entry = tk.Entry(win, show="*")
     pass_entry.pack()
 
+    # The bcrypt check runs on the auth workers and login_done() is called
+    # back on the Tk thread, so the window keeps repainting meanwhile.
     def do_login():
         username = user_entry.get()
         password = pass_entry.get()
-        conn = connect_db()
-        cursor = conn.cursor()
-        cursor.execute("SELECT password FROM users WHERE username=?", (username,))
-        row = cursor.fetchone()
-        if row and bcrypt.checkpw(password.encode(), row[0]):
+        if auth.call(win, auth.authenticate, username, password, done=login_done, failed=login_failed):
+            login_btn.config(state=tk.DISABLED)
+        else:
+            messagebox.showwarning("Busy", "Still checking a login, please try again")
+
+    def login_failed(error):
+        login_btn.config(state=tk.NORMAL)
+        messagebox.showerror("Failed", f"Login failed: {error}")
+
+    def login_done(account):
+        login_btn.config(state=tk.NORMAL)
+        if account:
+            auth.session.start(account)
             messagebox.showinfo("Success", "Login Successful")
             win.destroy()
             open_dashboard()
         else:
             messagebox.showerror("Failed", "Invalid credentials")
 
-    tk.Button(win, text="Login", command=do_login).pack(pady=10)
+    login_btn = tk.Button(win, text="Login", command=do_login)
+    login_btn.pack(pady=10)
     tk.Button(win, text="Back", command=win.destroy).pack()
 
 def signup_screen():
@@ -279,19 +349,24 @@ def signup_screen():
         if not username or not password:
             messagebox.showwarning("Error", "Fields required")
             return
-        hashed = bcrypt.hashpw(password.encode(), bcrypt.gensalt())
-        try:
-            conn = connect_db()
-            cursor = conn.cursor()
-            cursor.execute("INSERT INTO users (username, password) VALUES (?, ?)", (username, hashed))
-            conn.commit()
-            conn.close()
-            messagebox.showinfo("Done", "Signup successful!")
-            win.destroy()
-        except sqlite3.IntegrityError:
+        if auth.call(win, auth.register, username, username, password, done=signup_done, failed=signup_failed):
+            signup_btn.config(state=tk.DISABLED)
+        else:
+            messagebox.showwarning("Busy", "Still creating an account, please try again")
+
+    def signup_done(user_id):
+        messagebox.showinfo("Done", "Signup successful!")
+        win.destroy()
+
+    def signup_failed(error):
+        signup_btn.config(state=tk.NORMAL)
+        if isinstance(error, sqlite3.IntegrityError):
             messagebox.showerror("Error", "Username already exists")
+        else:
+            messagebox.showerror("Error", f"Could not create account: {error}")
 
-    tk.Button(win, text="Sign Up", command=do_signup).pack(pady=10)
+    signup_btn = tk.Button(win, text="Sign Up", command=do_signup)
+    signup_btn.pack(pady=10)
     tk.Button(win, text="Back", command=win.destroy).pack()
 
 # -------------------------
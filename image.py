@@ -1,32 +1,19 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
-from PIL import Image, ImageTk
+import app_shell
 import sqlite3
-import bcrypt
+import database
+import auth
 
 # DB setup
-conn = sqlite3.connect("SmartFaceRecognition.db")
-cursor = conn.cursor()
+database.create_tables()
 
 def show_login_page():
     messagebox.showinfo("Redirect", "This would take you to the login page.")
 
-def signup_page():
-    root = tk.Tk()
-    root.title("Sign Up")
-    root.geometry("900x500")
-    root.resizable(True, True)
-
-    # Load background image
-    try:
-        bg_img = Image.open("FACE.png")
-    except:
-        bg_img = Image.new("RGB", (900, 700), "black")
-
-    bg_img = bg_img.resize((900, 500), Image.Resampling.LANCZOS)
-    bg_photo = ImageTk.PhotoImage(bg_img)
-    bg_label = tk.Label(root, image=bg_photo)
-    bg_label.image = bg_photo
+def signup_page(app, root):
+    # Background image, resized once by the asset cache
+    bg_label = tk.Label(root, image=app.assets.image("FACE.png", (900, 500), fallback="black"))
     bg_label.place(x=0, y=0, relwidth=1, relheight=1)
 
     # Form frame
@@ -87,29 +74,44 @@ def signup_page():
             messagebox.showerror("Mismatch", "Passwords do not match.")
             return
 
-        hashed_pw = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt())
-        try:
-            cursor.execute("INSERT INTO Users (name, username, password, role) VALUES (?, ?, ?, 'admin')",
-                           (fullname, username, hashed_pw))
-            conn.commit()
-            messagebox.showinfo("Success", "Account created successfully!")
-            root.destroy()
-            show_login_page()
-        except sqlite3.IntegrityError:
+        if auth.call(root, auth.register, fullname, username, password, "admin",
+                     done=signup_done, failed=signup_failed):
+            signup_btn.config(state=tk.DISABLED)
+        else:
+            messagebox.showwarning("Busy", "Still creating an account, please try again.")
+
+    def signup_done(user_id):
+        messagebox.showinfo("Success", "Account created successfully!")
+        clear()
+        show_login_page()
+
+    def signup_failed(error):
+        signup_btn.config(state=tk.NORMAL)
+        if isinstance(error, sqlite3.IntegrityError):
             messagebox.showerror("Error", "Username already exists.")
+        else:
+            messagebox.showerror("Error", f"Could not create account: {error}")
 
-    ttk.Button(form_frame, text="Sign Up", command=signup).pack(pady=10)
+    signup_btn = ttk.Button(form_frame, text="Sign Up", command=signup)
+    signup_btn.pack(pady=10)
 
     tk.Label(form_frame, text="Already have an account?", bg="white", font=("Times new roman", 9)).pack()
     tk.Button(form_frame, text="Login here", bg="white", fg="blue", bd=0,
               font=("Times new roman", 9, "underline"),
-              command=lambda: [root.destroy(), show_login_page()]).pack()
+              command=show_login_page).pack()
 
     tk.Label(form_frame, text="© 2025 - Group 13 Project", font=("Times new roman", 9),
              bg="white").pack(side=tk.BOTTOM, pady=(10, 5))
 
-    root.mainloop()
+    def clear():
+        for entry in (fullname_entry, username_entry, password_entry, confirm_entry):
+            entry.delete(0, tk.END)
+        signup_btn.config(state=tk.NORMAL)
+    root.on_show = clear
 
 
 # Launch the sign-up page
-signup_page()
+app = app_shell.App("Sign Up", "900x500")
+app.root.resizable(True, True)
+app.add("signup", signup_page)
+app.run("signup")
@@ -1,13 +1,11 @@
 import cv2
 import numpy as np
 import os
+import face_model
+import dataset_loader
 
 dataset_path = 'dataset'
 recognizer = cv2.face.LBPHFaceRecognizer_create()
-face_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_frontalface_default.xml')
-
-faces = []
-labels = []
 
 dataset_path = 'dataset'
 
@@ -15,17 +13,27 @@ dataset_path = 'dataset'
 if not os.path.exists(dataset_path):
     os.makedirs(dataset_path)
 
-for filename in os.listdir(dataset_path):
-    if filename.endswith('.jpg'):
-        path = os.path.join(dataset_path, filename)
-        img = cv2.imread(path, cv2.IMREAD_GRAYSCALE)
-        label = int(filename.split('_')[0])  # Extract ID from filename like 123_0.jpg
-        faces.append(img)
-        labels.append(label)
+# Walks flat files and per-person folders; IDs come from names like 123_0.jpg.
+# Name labels (BRIAN_RUKENYA_1.jpg) get the next free IDs after the numeric
+# ones, and the manifest maps every ID back to its label.
+data = dataset_loader.load_dataset(dataset_path)
+ids = {name: int(name) for name in set(data.names) if name.isdigit()}
+for name in sorted(set(data.names) - set(ids)):
+    ids[name] = max(ids.values(), default=-1) + 1
+labels = [ids[name] for name in data.names]
+names = {label: name for name, label in ids.items()}
+digests = {}
+for label, digest in zip(labels, data.digests):
+    digests.setdefault(label, []).append(digest)
 
-if faces and labels:
-    recognizer.train(faces, np.array(labels))
+if labels:
+    recognizer.train(list(data.faces), np.array(labels, dtype=np.int32))
     recognizer.save('trained_model.yml')
+    face_model.save_manifest([
+        {"id": label, "name": names[label], "reg_no": None,
+         "images": len(d), "hash": face_model.combine_digests(d)}
+        for label, d in digests.items()
+    ], 'trained_model.yml')
     print("✅ Model trained and saved successfully.")
 else:
     print("⚠️ No training data found in the dataset folder.")
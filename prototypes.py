@@ -0,0 +1,119 @@
+import os
+import sys
+import time
+import tempfile
+import cv2
+import numpy as np
+import dataset_loader
+from embedding_recognizer import LBPHistogramEmbedder
+from ann_index import kmeans
+
+# How many prototypes train_full()/train_incremental() keep per person.
+# 0 (the default) keeps every captured image. Compacting is opt-in because
+# it trades some accuracy for a smaller model; the benchmark below shows
+# how much on a given dataset.
+PROTOTYPES_PER_PERSON = int(os.environ.get("SMARTFACE_PROTOTYPES", "0"))
+
+
+# -------------------------
+# Near-Duplicate Filter
+# -------------------------
+# Capture loops grab a face every frame, so most of the 20 crops are the
+# same pose. Each crop is shrunk to a 24x24 thumbnail with zero mean and
+# unit norm; a crop whose correlation with any kept thumbnail is above
+# `threshold` is skipped. Someone standing still would otherwise have
+# nearly every crop skipped, so after `max_rejects` skips in a row the next
+# crop is kept anyway.
+class DuplicateFilter:
+    def __init__(self, threshold=0.97, size=(24, 24), max_rejects=10):
+        self.threshold = threshold
+        self.size = size
+        self.max_rejects = max_rejects
+        self.kept = []
+        self.rejects = 0
+
+    def thumbnail(self, face):
+        small = cv2.resize(face, self.size, interpolation=cv2.INTER_AREA).astype(np.float32).ravel()
+        small -= small.mean()
+        norm = np.linalg.norm(small)
+        return small / norm if norm else small
+
+    def accept(self, face):
+        thumb = self.thumbnail(face)
+        if (self.kept and self.rejects < self.max_rejects
+                and float(np.max(np.stack(self.kept) @ thumb)) > self.threshold):
+            self.rejects += 1
+            return False
+        self.rejects = 0
+        self.kept.append(thumb)
+        return True
+
+    def reset(self):
+        self.kept = []
+        self.rejects = 0
+
+
+# -------------------------
+# Gallery Compaction
+# -------------------------
+# Clusters each person's faces on their LBP histograms and keeps the medoid
+# of every cluster, i.e. a real image, so the result can be fed to LBPH as
+# well as to the embedding recognizers. Returns the kept row indices.
+def select_prototypes(faces, labels, per_person=PROTOTYPES_PER_PERSON, embedder=None):
+    labels = np.asarray(labels)
+    if not per_person or not len(faces):
+        return np.arange(len(labels))
+    embedder = embedder or LBPHistogramEmbedder()
+    keep = []
+    for label in np.unique(labels):
+        rows = np.flatnonzero(labels == label)
+        if len(rows) <= per_person:
+            keep.extend(rows)
+            continue
+        vectors = embedder.embed([faces[i] for i in rows])
+        centroids = kmeans(vectors, per_person)
+        assign = np.argmax(vectors @ centroids.T, axis=1)
+        for c in range(per_person):
+            members = np.flatnonzero(assign == c)
+            if len(members):
+                keep.append(rows[members[np.argmax(vectors[members] @ centroids[c])]])
+    return np.sort(np.asarray(keep, dtype=np.int64))
+
+
+# -------------------------
+# Benchmark: full gallery vs prototypes
+# -------------------------
+# Every other image of each person is held out for testing; the rest is
+# trained once in full and once compacted to `per_person` prototypes.
+def benchmark(data_dir=dataset_loader.DATASET_DIR, per_person=PROTOTYPES_PER_PERSON or 5, backend="lbph"):
+    import face_model
+
+    data = dataset_loader.load_dataset(data_dir)
+    names = sorted(set(data.names))
+    labels = np.array([names.index(n) for n in data.names], dtype=np.int32)
+    test = np.zeros(len(labels), dtype=bool)
+    for label in range(len(names)):
+        test[np.flatnonzero(labels == label)[1::2]] = True
+    train = np.flatnonzero(~test)
+    test = np.flatnonzero(test)
+    print(f"{len(names)} people, {len(train)} train / {len(test)} test images")
+
+    compact = train[select_prototypes(data.faces[train], labels[train], per_person)]
+    tmp = tempfile.mkdtemp()
+    for title, rows in (("full", train), (f"{per_person}/person", compact)):
+        recognizer = face_model.create_recognizer(backend)
+        recognizer.train(list(data.faces[rows]), labels[rows])
+        path = os.path.join(tmp, title.replace("/", "_") + os.path.splitext(face_model.MODEL_PATHS[backend])[1])
+        recognizer.save(path)
+        size = sum(os.path.getsize(os.path.join(d, f)) for d, _, fs in os.walk(path) for f in fs) \
+            if os.path.isdir(path) else os.path.getsize(path)
+
+        start = time.perf_counter()
+        predicted = [recognizer.predict(data.faces[i])[0] for i in test]
+        ms = (time.perf_counter() - start) / len(test) * 1000
+        accuracy = float(np.mean(np.array(predicted) == labels[test]))
+        print(f"{title:<12}{len(rows):>5} samples  {size / 1024:>8.0f} KB  {ms:.2f} ms/predict  accuracy {accuracy:.3f}")
+
+
+if __name__ == "__main__":
+    benchmark(*sys.argv[1:2])
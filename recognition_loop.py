@@ -0,0 +1,238 @@
+import sys
+import json
+import time
+import socket
+import argparse
+from collections import namedtuple
+import cv2
+import face_model
+import face_detection
+from face_detection import crop_and_resize_face
+from frame_source import FrameSource
+from face_tracker import FaceTracker
+
+CONFIDENCE_THRESHOLD = 60
+
+# kind is "granted" or "unknown"; name is None for unknown faces.
+AccessEvent = namedtuple("AccessEvent", ["kind", "name", "label", "confidence", "box", "track_id",
+                                         "frame_id", "timestamp"])
+
+
+# -------------------------
+# Event Sinks
+# -------------------------
+# A sink gets every decision through event(e) and, if it has a frame()
+# method, every annotated frame as frame(image, faces) with faces holding
+# (x, y, w, h, name, granted). frame() returning True stops the loop.
+def event_dict(event):
+    data = event._asdict()
+    data["box"] = list(event.box)
+    data["confidence"] = round(float(event.confidence), 2)
+    return data
+
+
+class StdoutSink:
+    def __init__(self, stream=None):
+        self.stream = stream or sys.stdout
+
+    def event(self, event):
+        self.stream.write(json.dumps(event_dict(event)) + "\n")
+        self.stream.flush()
+
+
+# One JSON datagram per event; UDP never blocks the loop on a slow or
+# missing listener.
+class SocketSink:
+    def __init__(self, host="127.0.0.1", port=5005):
+        self.address = (host, port)
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+
+    def event(self, event):
+        try:
+            self.sock.sendto(json.dumps(event_dict(event)).encode("utf-8"), self.address)
+        except OSError:
+            pass
+
+    def close(self):
+        self.sock.close()
+
+
+# The only sink that touches the display. It draws and shows at most
+# max_fps frames a second, so imshow/waitKey no longer run on every frame.
+class PreviewSink:
+    def __init__(self, title="Face Recognition", max_fps=15.0, quit_key="q"):
+        self.title = title
+        self.interval = 1.0 / max_fps if max_fps else 0.0
+        self.quit_key = ord(quit_key)
+        self.last = 0.0
+        self.shown = False
+
+    def event(self, event):
+        pass
+
+    def frame(self, image, faces):
+        now = time.monotonic()
+        if now - self.last < self.interval:
+            return False
+        self.last = now
+        for (x, y, w, h, name, granted) in faces:
+            color = (0, 255, 0) if granted else (0, 0, 255)
+            cv2.rectangle(image, (x, y), (x + w, y + h), color, 2)
+            cv2.putText(image, name or "Unknown", (x, y - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.8, color, 2)
+        cv2.imshow(self.title, image)
+        self.shown = True
+        return cv2.waitKey(1) & 0xFF == self.quit_key
+
+    def close(self):
+        if self.shown:
+            cv2.destroyWindow(self.title)
+            self.shown = False
+
+
+# -------------------------
+# Recognition Loop
+# -------------------------
+# The detect -> track -> predict -> decide loop shared by the GUI pages and
+# the headless gate mode. A face is granted when its confidence is under
+# `threshold`. Each track emits an event when it is first decided and
+# whenever its decision changes, not on every frame. On top of that a
+# granted identity stays quiet until it has been out of sight for `cooldown`
+# seconds, so losing and re-acquiring a track does not grant twice. With
+# stop_on_grant run() returns the first granted event, otherwise it keeps
+# going (continuous mode) until the source ends, a sink asks to stop or
+# stop() is called.
+class RecognitionLoop:
+    def __init__(self, source=0, recognizer=None, names=None, detector=None, sinks=(),
+                 threshold=CONFIDENCE_THRESHOLD, stop_on_grant=False, tracker=None, cooldown=0.0):
+        self.source = source
+        self.recognizer = recognizer or face_model.load_recognizer()
+        self.names = face_model.label_names() if names is None else names
+        self.detector = detector or face_detection.FaceDetector(roi_refresh=5)
+        self.sinks = list(sinks)
+        self.threshold = threshold
+        self.stop_on_grant = stop_on_grant
+        self.tracker = tracker or FaceTracker()
+        self.cooldown = cooldown
+        self.frames = 0
+        self._running = False
+        self._decided = {}
+        self._granted_at = {}
+
+    def stop(self):
+        self._running = False
+
+    def emit(self, event):
+        for sink in self.sinks:
+            sink.event(event)
+
+    def process(self, gray, frame_id=0, timestamp=None):
+        timestamp = time.time() if timestamp is None else timestamp
+        now = time.monotonic()
+        faces, events = [], []
+        for track in self.tracker.update(self.detector.detect(gray)):
+            (x, y, w, h) = track.box
+            if self.tracker.due(track):
+                face = crop_and_resize_face(gray, x, y, w, h)
+                self.tracker.record(track, *self.recognizer.predict(face))
+            granted = track.confidence < self.threshold
+            name = self.names.get(track.label, "Unknown") if granted else None
+            faces.append((x, y, w, h, name, granted))
+            decision = (track.label, granted) if granted else (None, False)
+            if self._decided.get(track.id) == decision:
+                if granted:
+                    self._granted_at[track.label] = now
+                continue
+            self._decided[track.id] = decision
+            if granted:
+                last = self._granted_at.get(track.label)
+                self._granted_at[track.label] = now
+                if last is not None and now - last < self.cooldown:
+                    continue
+            events.append(AccessEvent("granted" if granted else "unknown", name, int(track.label),
+                                          float(track.confidence), (x, y, w, h), track.id, frame_id, timestamp))
+        live = {t.id for t in self.tracker.tracks}
+        self._decided = {k: v for k, v in self._decided.items() if k in live}
+        return faces, events
+
+    def run(self):
+        cap = self.source if isinstance(self.source, FrameSource) else FrameSource(self.source)
+        if not cap.isOpened():
+            cap.release()
+            raise RuntimeError(f"Could not open video source {self.source!r}")
+        cap.start()
+        self.detector.reset()
+        self.tracker.reset()
+        self._decided = {}
+        self._granted_at = {}
+        self._running = True
+        try:
+            while self._running:
+                ret, frame = cap.read()
+                if not ret:
+                    break
+                self.frames += 1
+                gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+                faces, events = self.process(gray, cap.read_id)
+                for event in events:
+                    self.emit(event)
+                    if self.stop_on_grant and event.kind == "granted":
+                        return event
+                for sink in self.sinks:
+                    if hasattr(sink, "frame") and sink.frame(frame, faces):
+                        return None
+        finally:
+            self._running = False
+            cap.release()
+            for sink in self.sinks:
+                if hasattr(sink, "close"):
+                    sink.close()
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run face recognition without a GUI and emit access events.")
+    parser.add_argument("--source", default="0", help="camera index, video file or stream URL")
+    parser.add_argument("--model", default=face_model.MODEL_PATH)
+    parser.add_argument("--threshold", type=float, default=CONFIDENCE_THRESHOLD)
+    parser.add_argument("--socket", default=None, metavar="HOST:PORT", help="also send events as UDP JSON datagrams")
+    parser.add_argument("--quiet", action="store_true", help="do not print events to stdout")
+    parser.add_argument("--log-db", default=None, metavar="PATH", help="also record events in this SQLite file")
+    parser.add_argument("--preview", action="store_true", help="show a preview window")
+    parser.add_argument("--preview-fps", type=float, default=10.0)
+    parser.add_argument("--stop-on-grant", action="store_true")
+    parser.add_argument("--cooldown", type=float, default=10.0, help="seconds before the same person is granted again")
+    parser.add_argument("--detector", choices=["haar", "lbp", "yunet"], default=face_detection.DEFAULT_BACKEND)
+    parser.add_argument("--scale", type=float, default=1.0, help="detection downscale factor, e.g. 0.5")
+    parser.add_argument("--roi-refresh", type=int, default=5, help="full-frame scan every N frames (0 = always)")
+    args = parser.parse_args(argv)
+
+    sinks = [] if args.quiet else [StdoutSink()]
+    if args.socket:
+        host, port = args.socket.rsplit(":", 1)
+        sinks.append(SocketSink(host, int(port)))
+    writer = None
+    if args.log_db:
+        import access_log
+        writer = access_log.AccessLogWriter(args.log_db, source=args.source)
+        sinks.append(writer)
+    if args.preview:
+        sinks.append(PreviewSink(max_fps=args.preview_fps))
+    source = int(args.source) if args.source.isdigit() else args.source
+    detector = face_detection.FaceDetector(args.detector, scale=args.scale, roi_refresh=args.roi_refresh)
+    loop = RecognitionLoop(source, face_model.load_recognizer(args.model), face_model.label_names(args.model),
+                           detector, sinks, args.threshold, args.stop_on_grant, cooldown=args.cooldown)
+    start = time.monotonic()
+    try:
+        loop.run()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if writer:
+            writer.stop()
+    elapsed = time.monotonic() - start
+    print(f"{loop.frames} frames in {elapsed:.1f}s ({loop.frames / elapsed if elapsed else 0:.1f} frames/s)",
+          file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
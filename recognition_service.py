@@ -0,0 +1,187 @@
+import os
+import sys
+import time
+import queue
+import argparse
+import multiprocessing as mp
+from collections import namedtuple, deque
+import cv2
+import face_model
+import face_detection
+from frame_source import FrameSource
+
+CONFIDENCE_THRESHOLD = 60
+
+# One message per processed frame; faces holds (x, y, w, h, label, name, confidence)
+# with name None when the face is above the confidence threshold.
+Recognition = namedtuple("Recognition", ["source", "frame_id", "timestamp", "latency", "faces"])
+
+
+# -------------------------
+# Worker Process
+# -------------------------
+# Each worker owns a slice of the streams: it opens them, loads the detector,
+# the LBPH model and the label manifest once, and from then on only reads
+# them. Frames never cross the process boundary, only the small results do.
+# Video files are read frame by frame; cameras and stream URLs only ever
+# hand over their newest frame.
+def is_file(source):
+    return isinstance(source, str) and os.path.isfile(source)
+
+
+def _worker(sources, model_path, threshold, detect_params, results, stop):
+    cv2.setNumThreads(1)
+    recognizer = face_model.load_recognizer(model_path)
+    names = face_model.label_names(model_path)
+    streams = [(source, FrameSource(source, keep_all=is_file(source)).start()) for source in sources]
+    detectors = {source: face_detection.FaceDetector(**detect_params) for source in sources}
+
+    try:
+        while streams and not stop.is_set():
+            idle = True
+            for source, cap in list(streams):
+                ret, frame = cap.read(timeout=0)
+                if not ret:
+                    if not cap.running:
+                        cap.release()
+                        streams.remove((source, cap))
+                        results.put(Recognition(source, -1, time.monotonic(), 0.0, None))
+                    continue
+                idle = False
+                timestamp, frame_id = cap.read_timestamp, cap.read_id
+                gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+                faces = []
+                for (x, y, w, h) in detectors[source].detect(gray):
+                    face = face_detection.crop_and_resize_face(gray, x, y, w, h)
+                    id_, conf = recognizer.predict(face)
+                    name = names.get(id_) if conf < threshold else None
+                    faces.append((int(x), int(y), int(w), int(h), id_, name, conf))
+                now = time.monotonic()
+                results.put(Recognition(source, frame_id, now, now - timestamp, faces))
+            if idle:
+                time.sleep(0.002)
+    finally:
+        for _, cap in streams:
+            cap.release()
+
+
+# -------------------------
+# Recognition Service
+# -------------------------
+# Runs N video sources (device indexes, file paths or stream URLs) across a
+# pool of worker processes. Streams are dealt round-robin to at most
+# `workers` processes; a source listed twice is only opened once.
+class RecognitionService:
+    def __init__(self, sources, model_path=face_model.MODEL_PATH, workers=None,
+                 threshold=CONFIDENCE_THRESHOLD, window=5.0, detect_params=None):
+        self.sources = list(dict.fromkeys(sources))
+        self.model_path = model_path
+        self.workers = min(workers or os.cpu_count() or 1, len(self.sources))
+        self.threshold = threshold
+        self.window = window
+        self.detect_params = detect_params or {"roi_refresh": 5}
+        self._ctx = mp.get_context("spawn")
+        self._results = self._ctx.Queue(maxsize=256)
+        self._stop = self._ctx.Event()
+        self._procs = []
+        self._seen = {source: deque() for source in self.sources}
+        self._finished = set()
+
+    def start(self):
+        for i in range(self.workers):
+            assigned = self.sources[i::self.workers]
+            proc = self._ctx.Process(target=_worker, name=f"recognizer-{i}", daemon=True,
+                                     args=(assigned, self.model_path, self.threshold, self.detect_params,
+                                           self._results, self._stop))
+            proc.start()
+            self._procs.append(proc)
+        return self
+
+    # Returns the next Recognition, or None once every stream has ended.
+    def get(self, timeout=None):
+        while not self.finished():
+            result = self._results.get(timeout=timeout)
+            if result.faces is None:
+                self._finished.add(result.source)
+                continue
+            seen = self._seen[result.source]
+            seen.append(result.timestamp)
+            while seen and seen[0] < result.timestamp - self.window:
+                seen.popleft()
+            return result
+        return None
+
+    def results(self, timeout=1.0):
+        while True:
+            try:
+                result = self.get(timeout)
+            except queue.Empty:
+                if not any(proc.is_alive() for proc in self._procs):
+                    return
+                continue
+            if result is None:
+                return
+            yield result
+
+    def finished(self):
+        return len(self._finished) == len(self.sources)
+
+    def throughput(self):
+        now = time.monotonic()
+        fps = {}
+        for source, seen in self._seen.items():
+            recent = [t for t in seen if t >= now - self.window]
+            fps[source] = len(recent) / self.window
+        return fps
+
+    def stop(self):
+        self._stop.set()
+        for proc in self._procs:
+            proc.join(timeout=5.0)
+            if proc.is_alive():
+                proc.terminate()
+        self._procs = []
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Recognize faces on several video sources at once.")
+    parser.add_argument("sources", nargs="+", help="camera index, video file or stream URL")
+    parser.add_argument("--model", default=face_model.MODEL_PATH)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--threshold", type=float, default=CONFIDENCE_THRESHOLD)
+    parser.add_argument("--detector", choices=["haar", "lbp", "yunet"], default=face_detection.DEFAULT_BACKEND)
+    parser.add_argument("--scale", type=float, default=1.0, help="detection downscale factor, e.g. 0.5")
+    parser.add_argument("--scale-factor", type=float, default=1.3)
+    parser.add_argument("--min-neighbors", type=int, default=5)
+    parser.add_argument("--min-size", type=int, default=0,
+                        help="smallest face side in full-resolution pixels (0: the detector's own minimum)")
+    parser.add_argument("--roi-refresh", type=int, default=5, help="full-frame scan every N frames (0 = always)")
+    args = parser.parse_args(argv)
+
+    sources = [int(s) if s.isdigit() else s for s in args.sources]
+    last_report = time.monotonic()
+    detect_params = {"backend": args.detector, "scale": args.scale, "scale_factor": args.scale_factor, "min_neighbors": args.min_neighbors,
+                     "min_size": (args.min_size, args.min_size) if args.min_size else None, "roi_refresh": args.roi_refresh}
+    with RecognitionService(sources, args.model, args.workers, args.threshold,
+                            detect_params=detect_params) as service:
+        try:
+            for result in service.results():
+                for (x, y, w, h, id_, name, conf) in result.faces:
+                    if name:
+                        print(f"{result.source}\t{result.frame_id}\t{name}\t{conf:.1f}\t{result.latency * 1000:.0f}ms")
+                if time.monotonic() - last_report >= service.window:
+                    last_report = time.monotonic()
+                    report = ", ".join(f"{s}: {fps:.1f} fps" for s, fps in service.throughput().items())
+                    print(f"[throughput] {report}", file=sys.stderr)
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == "__main__":
+    main()
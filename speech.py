@@ -0,0 +1,152 @@
+import os
+import time
+import queue
+import threading
+
+# "pyttsx3" or "null" (no audio, for headless boxes and tests).
+DEFAULT_BACKEND = os.environ.get("SMARTFACE_TTS", "pyttsx3")
+
+
+# -------------------------
+# Backends
+# -------------------------
+# A backend is created and used only on the speech worker thread: pyttsx3
+# engines are not safe to drive from another thread than the one that
+# created them.
+class Pyttsx3Backend:
+    def __init__(self, rate=None):
+        import pyttsx3
+        self.engine = pyttsx3.init()
+        if rate:
+            self.engine.setProperty("rate", rate)
+
+    def say(self, text):
+        self.engine.say(text)
+        self.engine.runAndWait()
+
+    def close(self):
+        self.engine.stop()
+
+
+class NullBackend:
+    def __init__(self):
+        self.spoken = []
+
+    def say(self, text):
+        self.spoken.append(text)
+
+    def close(self):
+        pass
+
+
+def create_backend(name=None):
+    name = name or DEFAULT_BACKEND
+    if name == "pyttsx3":
+        return Pyttsx3Backend()
+    if name == "null":
+        return NullBackend()
+    raise ValueError(f"Unknown speech backend '{name}'")
+
+
+# -------------------------
+# Speech Service
+# -------------------------
+# speak() only puts the text on a bounded queue and returns; one worker
+# thread owns the engine and says the queued lines in order. A message with
+# a `key` (e.g. the person's name) is dropped while the same key is still
+# queued or was spoken less than `repeat_after` seconds ago. When the queue
+# is full new messages are dropped, never waited on. `backend` is a backend
+# object or a name for create_backend().
+class SpeechService:
+    def __init__(self, backend=None, maxsize=4, repeat_after=30.0):
+        self.backend = backend
+        self.repeat_after = repeat_after
+        self.queue = queue.Queue(maxsize=maxsize)
+        self.lock = threading.Lock()
+        self.pending = set()
+        self.last_spoken = {}
+        self.dropped = 0
+        self.thread = None
+
+    def start(self):
+        if self.thread is None:
+            self.thread = threading.Thread(target=self._run, name="speech", daemon=True)
+            self.thread.start()
+        return self
+
+    def speak(self, text, key=None):
+        self.start()
+        now = time.monotonic()
+        with self.lock:
+            if key is not None:
+                if key in self.pending or now - self.last_spoken.get(key, -self.repeat_after) < self.repeat_after:
+                    return False
+            try:
+                self.queue.put_nowait((text, key))
+            except queue.Full:
+                self.dropped += 1
+                return False
+            if key is not None:
+                self.pending.add(key)
+        return True
+
+    def _run(self):
+        if self.backend is None or isinstance(self.backend, str):
+            try:
+                self.backend = create_backend(self.backend)
+            except Exception as e:
+                print(f"[speech] disabled: {e}")
+                self.backend = NullBackend()
+        try:
+            while True:
+                item = self.queue.get()
+                if item is None:
+                    break
+                text, key = item
+                try:
+                    self.backend.say(text)
+                except Exception as e:
+                    print(f"[speech] {e}")
+                with self.lock:
+                    if key is not None:
+                        self.pending.discard(key)
+                        self.last_spoken[key] = time.monotonic()
+                self.queue.task_done()
+        finally:
+            self.backend.close()
+
+    # Blocks until everything queued so far has been spoken (tests, shutdown).
+    def wait(self):
+        self.queue.join()
+
+    def stop(self, timeout=2.0):
+        if self.thread is None:
+            return
+        while True:
+            try:
+                self.queue.put(None, timeout=timeout)
+                break
+            except queue.Full:
+                try:
+                    self.queue.get_nowait()
+                    self.queue.task_done()
+                except queue.Empty:
+                    pass
+        self.thread.join(timeout)
+        self.thread = None
+
+
+_service = None
+_service_lock = threading.Lock()
+
+
+def get_service():
+    global _service
+    with _service_lock:
+        if _service is None:
+            _service = SpeechService().start()
+        return _service
+
+
+def speak(text, key=None):
+    return get_service().speak(text, key)
@@ -1,69 +1,111 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
-import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+import database
+import face_model
+import app_shell
 
 # --- DB SETUP ---
-conn = sqlite3.connect("users.db")
-cursor = conn.cursor()
-cursor.execute("""CREATE TABLE IF NOT EXISTS UserDetails (
-    id INTEGER PRIMARY KEY AUTOINCREMENT,
-    reg_no TEXT NOT NULL,
-    full_name TEXT NOT NULL,
-    year TEXT NOT NULL
-)""")
-conn.commit()
+database.create_tables()
+PAGE_SIZE = 200
+# Face data removal (and the retrain it may need) runs here, one job at a
+# time, off the Tk thread.
+face_worker = ThreadPoolExecutor(max_workers=1, thread_name_prefix="face-data")
 
 # --- USER MANAGEMENT PAGE ---
-def show_user_management_page():
+def build_user_management_page(app, window):
+    # The table only holds the pages fetched so far. view["fetch"](after_id)
+    # returns the next PAGE_SIZE rows of the current listing (everyone, a
+    # search or a year) and scrolling near the bottom loads another page.
+    # Row iids are student ids, so edits and deletes touch just that row.
+    view = {"fetch": None, "last_id": 0, "done": True}
+
+    def show(fetch):
+        tree.delete(*tree.get_children())
+        view.update(fetch=fetch, last_id=0, done=False)
+        load_more()
+
+    def load_more():
+        if view["done"]:
+            return
+        rows = view["fetch"](view["last_id"])
+        for row in rows:
+            tree.insert("", "end", iid=str(row[0]), values=row)
+        if rows:
+            view["last_id"] = rows[-1][0]
+        view["done"] = len(rows) < PAGE_SIZE
+
+    def on_scroll(first, last):
+        scrollbar.set(first, last)
+        if not view["done"] and float(last) > 0.9:
+            window.after_idle(load_more)
+
     def load_data():
-        for i in tree.get_children():
-            tree.delete(i)
-        cursor.execute("SELECT * FROM UserDetails")
-        for row in cursor.fetchall():
-            tree.insert("", "end", values=row)
+        show(lambda after_id: database.list_students(PAGE_SIZE, after_id))
 
     def search():
         query = search_var.get().strip()
         if not query:
             load_data()
             return
-        for i in tree.get_children():
-            tree.delete(i)
-        cursor.execute("SELECT * FROM UserDetails WHERE reg_no LIKE ? OR full_name LIKE ?", 
-                       (f"%{query}%", f"%{query}%"))
-        for row in cursor.fetchall():
-            tree.insert("", "end", values=row)
+        show(lambda after_id: database.search_students(query, PAGE_SIZE, after_id=after_id))
 
     def filter_year(event):
         selected_year = year_filter.get()
         if selected_year == "All":
             load_data()
             return
-        for i in tree.get_children():
-            tree.delete(i)
-        cursor.execute("SELECT * FROM UserDetails WHERE year=?", (selected_year,))
-        for row in cursor.fetchall():
-            tree.insert("", "end", values=row)
+        show(lambda after_id: database.students_by_year(selected_year, PAGE_SIZE, after_id))
 
     def delete_selected():
         selected = tree.selection()
         if not selected:
             messagebox.showwarning("Warning", "Please select a row to delete")
             return
-        item = tree.item(selected)
-        record_id = item['values'][0]
-        cursor.execute("DELETE FROM UserDetails WHERE id=?", (record_id,))
-        conn.commit()
-        load_data()
-        messagebox.showinfo("Deleted", "Record deleted successfully")
+        item = tree.item(selected[0])
+        record_id, full_name = item['values'][0], str(item['values'][2]).strip()
+        if not messagebox.askyesno("Delete", f"Delete the record of {full_name}?"):
+            return
+        database.delete_student(record_id)
+        tree.delete(selected[0])
+
+        # Images and the model label are keyed by name, so they stay while
+        # another student row still has this name.
+        label = full_name.replace(" ", "_")
+        if database.count_students_with_label(label):
+            messagebox.showinfo("Deleted", "Record deleted. Face data kept: another student has the same name.")
+            return
+        if not messagebox.askyesno("Delete face data",
+                                   f"Also delete the face images of {full_name} and remove them from the model?"):
+            messagebox.showinfo("Deleted", "Record deleted successfully")
+            return
+        run_face_job(face_model.delete_person, (label,), f"Removing face data of {full_name}...",
+                     "Could not remove face data", ("Deleted", "Record and face data deleted successfully"))
+
+    def run_face_job(fn, args, busy, failed, done):
+        future = face_worker.submit(fn, *args)
+        status.config(text=busy)
+
+        def poll():
+            if not window.winfo_exists():
+                return
+            if not future.done():
+                window.after(100, poll)
+                return
+            status.config(text="")
+            if future.exception():
+                messagebox.showerror("Error", f"{failed}: {future.exception()}")
+            else:
+                messagebox.showinfo(*done)
+        window.after(100, poll)
 
     def edit_selected():
         selected = tree.selection()
         if not selected:
             messagebox.showwarning("Warning", "Please select a row to edit")
             return
-        item = tree.item(selected)
-        data = item['values']
+        iid = selected[0]
+        data = tree.item(iid)['values']
 
         edit_win = tk.Toplevel(window)
         edit_win.title("Edit User")
@@ -94,27 +136,51 @@ def show_user_management_page():
             if not new_reg or not new_name or not new_year:
                 messagebox.showerror("Error", "All fields required")
                 return
-            cursor.execute("UPDATE UserDetails SET reg_no=?, full_name=?, year=? WHERE id=?",
-                           (new_reg, new_name, new_year, data[0]))
-            conn.commit()
-            load_data()
-            messagebox.showinfo("Success", "User updated successfully")
+            database.update_student(data[0], new_reg, new_name, new_year)
+            if tree.exists(iid):
+                if year_filter.get() in ("All", new_year):
+                    tree.item(iid, values=(data[0], new_reg, new_name, new_year))
+                else:
+                    tree.delete(iid)
             edit_win.destroy()
+            rename_face_data(str(data[2]).strip(), new_name)
+
+        # The face images and model label follow a name change, so the
+        # student is greeted by the new name. They are left alone while
+        # another row still uses the old name, or when the new name already
+        # has face data or another row.
+        def rename_face_data(old_name, new_name):
+            old, new = old_name.replace(" ", "_"), new_name.replace(" ", "_")
+            names = face_model.dataset_names()
+            if old == new or old not in names:
+                messagebox.showinfo("Success", "User updated successfully")
+                return
+            shared = database.count_students_with_label(old) or database.count_students_with_label(new) > 1
+            if new in names or shared:
+                messagebox.showinfo("Success", "User updated. Face data kept under the old name: "
+                                               "another student shares the old or the new name.")
+                return
+            run_face_job(face_model.rename_person, (old, new), f"Renaming face data of {old_name}...",
+                         "Could not rename face data", ("Success", "User and face data updated successfully"))
 
         ttk.Button(edit_win, text="Update", command=update).pack(pady=20)
 
     # --- UI ---
-    window = tk.Tk()
-    window.title("User Details Management")
-    window.geometry("800x500")
-    window.config(bg="lightgray")
-
     top_frame = tk.Frame(window, bg="lightgray")
     top_frame.pack(fill=tk.X, padx=10, pady=5)
 
     tk.Label(top_frame, text="Search:", bg="lightgray").pack(side=tk.LEFT)
     search_var = tk.StringVar()
-    tk.Entry(top_frame, textvariable=search_var, width=30).pack(side=tk.LEFT, padx=5)
+    search_entry = tk.Entry(top_frame, textvariable=search_var, width=30)
+    search_entry.pack(side=tk.LEFT, padx=5)
+    pending_search = [None]
+
+    # Search as you type, once typing pauses for 250 ms
+    def schedule_search(event):
+        if pending_search[0]:
+            window.after_cancel(pending_search[0])
+        pending_search[0] = window.after(250, search)
+    search_entry.bind("<KeyRelease>", schedule_search)
     ttk.Button(top_frame, text="Search", command=search).pack(side=tk.LEFT)
 
     tk.Label(top_frame, text="  Filter by Year:", bg="lightgray").pack(side=tk.LEFT, padx=10)
@@ -123,7 +189,12 @@ def show_user_management_page():
     year_filter.pack(side=tk.LEFT)
     year_filter.bind("<<ComboboxSelected>>", filter_year)
 
-    tree = ttk.Treeview(window, columns=("ID", "Reg No", "Full Name", "Year"), show="headings")
+    table_frame = tk.Frame(window, bg="lightgray")
+    table_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+    tree = ttk.Treeview(table_frame, columns=("ID", "Reg No", "Full Name", "Year"), show="headings",
+                        yscrollcommand=on_scroll)
+    scrollbar = ttk.Scrollbar(table_frame, orient=tk.VERTICAL, command=tree.yview)
+    scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
     tree.heading("ID", text="ID")
     tree.heading("Reg No", text="Reg No")
     tree.heading("Full Name", text="Full Name")
@@ -132,17 +203,25 @@ def show_user_management_page():
     tree.column("Reg No", width=150)
     tree.column("Full Name", width=300)
     tree.column("Year", width=100, anchor='center')
-    tree.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+    tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
 
     btn_frame = tk.Frame(window, bg="lightgray")
     btn_frame.pack(pady=10)
 
     ttk.Button(btn_frame, text="Edit Selected", command=edit_selected).pack(side=tk.LEFT, padx=10)
     ttk.Button(btn_frame, text="Delete Selected", command=delete_selected).pack(side=tk.LEFT)
+    status = tk.Label(btn_frame, text="", bg="lightgray")
+    status.pack(side=tk.LEFT, padx=10)
 
-    load_data()
-    window.mainloop()
+    # Each visit starts again from the first page of everyone.
+    def reset():
+        search_var.set("")
+        year_filter.set("All")
+        load_data()
+    window.on_show = reset
 
 # --- LAUNCH PAGE ---
 if __name__ == "__main__":
-    show_user_management_page()
+    app = app_shell.App("User Details Management")
+    app.add("users", build_user_management_page, "User Details Management", "800x500", bg="lightgray")
+    app.run("users")
@@ -0,0 +1,227 @@
+import sys
+import time
+import queue
+import threading
+import tkinter as tk
+import numpy as np
+import cv2
+from PIL import Image, ImageTk
+from frame_source import FrameSource
+
+
+# -------------------------
+# Video Widget
+# -------------------------
+# A Label showing the newest camera frame inside a Tk window. Any thread may
+# call submit(frame, faces); it only swaps a reference, so a frame that
+# arrives before the previous one was drawn replaces it (counted in
+# `skipped`). A timer on the Tk thread renders at most max_fps frames a
+# second: shrink to the widget size, convert to RGB, draw the boxes and
+# names, and paste into the one PhotoImage the label was created with.
+# After each render the next tick is pushed back far enough that drawing
+# uses at most `cpu_share` of the Tk thread, so a slow machine shows fewer
+# frames instead of a frozen window. Detection runs at its own rate on the
+# producer's thread. call_soon(fn, *args) runs fn on the Tk thread at the
+# next tick, for results coming back from worker threads. The timer only
+# runs between start() and stop(): pages stop it when they are hidden or
+# their feed ends, since a cached page is never destroyed.
+class VideoView(tk.Label):
+    def __init__(self, master, size=(640, 480), max_fps=15.0, cpu_share=0.3, **kwargs):
+        kwargs.setdefault("bg", "black")
+        super().__init__(master, **kwargs)
+        self.size = size
+        self.interval = 1.0 / max_fps
+        self.cpu_share = cpu_share
+        self.canvas = np.zeros((size[1], size[0], 3), np.uint8)
+        self.photo = ImageTk.PhotoImage(Image.fromarray(self.canvas), master=self)
+        self.config(image=self.photo)
+        self.lock = threading.Lock()
+        self.latest = None
+        self.calls = queue.SimpleQueue()
+        self.rendered = 0
+        self.skipped = 0
+        self.render_time = 0.0
+        self.closed = False
+        self.active = False
+        self.feed = None
+        self._job = None
+        self.bind("<Destroy>", self._on_destroy, add="+")
+
+    def submit(self, frame, faces=()):
+        with self.lock:
+            if self.latest is not None:
+                self.skipped += 1
+            self.latest = (frame, faces)
+
+    def call_soon(self, fn, *args):
+        self.calls.put((fn, args))
+
+    def start(self):
+        if self._job is None and not self.closed:
+            self.active = True
+            self._job = self.after(0, self._tick)
+        return self
+
+    def stop(self):
+        self.active = False
+        if self._job is not None:
+            self.after_cancel(self._job)
+            self._job = None
+
+    def _on_destroy(self, event):
+        if event.widget is self:
+            self.closed = True
+            self.stop()
+
+    def _tick(self):
+        self._job = None
+        spent = 0.0
+        try:
+            while not self.calls.empty() and self.active:
+                fn, args = self.calls.get()
+                try:
+                    fn(*args)
+                except Exception as e:
+                    print(f"[video] {e}")
+            if not self.active:
+                return
+            with self.lock:
+                item, self.latest = self.latest, None
+            if item is not None:
+                start = time.perf_counter()
+                self.render(*item)
+                spent = time.perf_counter() - start
+                self.rendered += 1
+                self.render_time += spent
+        finally:
+            if self.active and not self.closed and self._job is None:
+                wait = max(self.interval - spent, spent * (1.0 / self.cpu_share - 1.0))
+                self._job = self.after(max(1, int(wait * 1000)), self._tick)
+
+    # faces hold (x, y, w, h) or (x, y, w, h, name, granted) in frame
+    # coordinates, the shape RecognitionLoop hands to its sinks.
+    def render(self, frame, faces=()):
+        width, height = self.size
+        h, w = frame.shape[:2]
+        scale = min(width / w, height / h)
+        small = cv2.resize(frame, (int(w * scale), int(h * scale)), interpolation=cv2.INTER_AREA)
+        rgb = cv2.cvtColor(small, cv2.COLOR_BGR2RGB)
+        for face in faces:
+            x, y, fw, fh = (int(v * scale) for v in face[:4])
+            name, granted = (face[4], face[5]) if len(face) > 4 else (None, True)
+            color = (0, 255, 0) if granted else (255, 0, 0)
+            cv2.rectangle(rgb, (x, y), (x + fw, y + fh), color, 2)
+            cv2.putText(rgb, name or ("Unknown" if len(face) > 4 else ""), (x, max(12, y - 8)),
+                        cv2.FONT_HERSHEY_SIMPLEX, 0.6, color, 2)
+        top, left = (height - rgb.shape[0]) // 2, (width - rgb.shape[1]) // 2
+        self.canvas[top:top + rgb.shape[0], left:left + rgb.shape[1]] = rgb
+        self.photo.paste(Image.fromarray(self.canvas))
+
+    def stats(self):
+        return {"rendered": self.rendered, "skipped": self.skipped,
+                "ms_per_frame": self.render_time / self.rendered * 1000 if self.rendered else None}
+
+
+# -------------------------
+# Feeding the Widget
+# -------------------------
+# A RecognitionLoop sink for a loop running on a worker thread: frames go
+# to the view and events reach `callback` on the Tk thread. Once the view
+# is destroyed frame() returns True, which ends the loop.
+class VideoSink:
+    def __init__(self, view, callback=None):
+        self.view = view
+        self.callback = callback
+
+    def event(self, event):
+        if self.callback:
+            self.view.call_soon(self.callback, event)
+
+    def frame(self, image, faces):
+        self.view.submit(image, faces)
+        return self.view.closed
+
+
+# Reads a camera on a worker thread. Each frame goes through
+# process(frame), which returns the faces to overlay or None to finish,
+# and then to the view. Once it ends the view's timer is stopped, unless a
+# newer feed has taken the view over since, and done(opened) runs on the Tk
+# thread, with opened False when the source could not be opened.
+class CameraFeed:
+    def __init__(self, view, process, source=0, done=None):
+        self.view = view
+        self.process = process
+        self.source = source
+        self.done = done
+        self._running = False
+        self.thread = None
+
+    def start(self):
+        self._running = True
+        self.thread = threading.Thread(target=self._run, name="camera-feed", daemon=True)
+        self.thread.start()
+        self.view.feed = self
+        self.view.start()
+        return self
+
+    def stop(self):
+        self._running = False
+
+    def _run(self):
+        cap = FrameSource(self.source)
+        opened = cap.isOpened()
+        try:
+            if opened:
+                cap.start()
+            while opened and self._running and not self.view.closed:
+                ret, frame = cap.read()
+                if not ret:
+                    break
+                faces = self.process(frame)
+                if faces is None:
+                    break
+                self.view.submit(frame, faces)
+        finally:
+            cap.release()
+            self.view.call_soon(self._finished, opened)
+
+    def _finished(self, opened):
+        if self.view.feed is self:
+            self.view.feed = None
+            self.view.stop()
+        if self.done:
+            self.done(opened)
+
+
+# -------------------------
+# Benchmark: render cost
+# -------------------------
+# Renders synthetic 640x480 frames with a few overlays: a fresh PhotoImage
+# per frame vs pasting into the reused one.
+def benchmark(n=200):
+    root = tk.Tk()
+    view = VideoView(root)
+    view.pack()
+    frame = np.random.randint(0, 255, (480, 640, 3), np.uint8)
+    faces = [(100, 100, 120, 120, "BRIAN_RUKENYA", True), (320, 140, 110, 110, None, False)]
+
+    start = time.perf_counter()
+    for _ in range(n):
+        photo = ImageTk.PhotoImage(Image.fromarray(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)))
+        view.config(image=photo)
+        root.update_idletasks()
+    fresh = (time.perf_counter() - start) / n * 1000
+    view.config(image=view.photo)
+
+    start = time.perf_counter()
+    for _ in range(n):
+        view.render(frame, faces)
+        root.update_idletasks()
+    reused = (time.perf_counter() - start) / n * 1000
+    root.destroy()
+    print(f"new PhotoImage per frame  {fresh:6.2f} ms")
+    print(f"VideoView.render (paste)  {reused:6.2f} ms  -> 15 fps costs {reused * 15 / 10:.1f}% of a core")
+
+
+if __name__ == "__main__":
+    benchmark(*(int(a) for a in sys.argv[1:2]))